@@ -0,0 +1,62 @@
+"""Benchmark the ELI backends (cvxpy, compiled ELIModel, direct and warm-started HiGHS) on cached mtus.
+
+Run from the repository root, data is loaded from (or downloaded into) the cache: 
+
+    python benchmarks/eli_backends.py 2025-07-07 --hours 24
+"""
+import argparse
+import contextlib
+import datetime as dt
+import io
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from domain_viewer.data_processing import load_range, load_data, ZONES, ELI_COLUMNS, create_request_session, prepare_exchange
+from domain_viewer.extended_lta_inclusion import calculate_FB_exchange, ELIModel, ELISequence
+
+def eli_inputs(mtu, request_session):
+    data = load_data(mtu, request_session, columns=ELI_COLUMNS)
+    mcp = data["mcp"].loc[mtu.isoformat()]
+    exchange = prepare_exchange(data["exchange"], mcp, mtu)
+    return data["domain"], data["lta"], mcp, exchange
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("date", help="Business day, e.g. 2025-07-07")
+    parser.add_argument("--hours", type=int, default=24)
+    args = parser.parse_args()
+
+    request_session = create_request_session()
+
+    start = pd.Timestamp(args.date).tz_localize("Europe/Berlin")
+    mtus = load_range(start, start + dt.timedelta(hours=args.hours), request_session)
+    model = ELIModel(ZONES)
+    sequence = ELISequence(ZONES, compare_cold=True)
+    backends = {
+        "cvxpy": lambda mtu, *d: calculate_FB_exchange(*d[:2], ZONES, *d[2:]),
+        "cvxpy-compiled": lambda mtu, *d: calculate_FB_exchange(*d[:2], ZONES, *d[2:], model=model),
+        "highs": lambda mtu, *d: calculate_FB_exchange(*d[:2], ZONES, *d[2:], backend="highs"),
+        "highs-warm": lambda mtu, *d: sequence.solve(*d, mtu=mtu.isoformat()),
+    }
+    results = []
+    for mtu in mtus:
+        with contextlib.redirect_stdout(io.StringIO()):
+            domain, lta, mcp, exchange = eli_inputs(mtu, request_session)
+            for name, solve in backends.items():
+                start_time = time.perf_counter()
+                *_, alpha = solve(mtu, domain.copy(), lta, mcp, exchange)
+                results.append({
+                    "mtu": mtu.isoformat(), "backend": name, "cbcos": len(domain), 
+                    "time": time.perf_counter() - start_time, "alpha": float(alpha)
+                })
+    results = pd.DataFrame(results)
+    alpha = results.pivot(index="mtu", columns="backend", values="alpha")
+    print(results.pivot(index="mtu", columns="backend", values="time").round(3))
+    print(results.groupby("backend").time.agg(["mean", "sum"]).round(3))
+    print("Max alpha deviation from cvxpy", alpha.sub(alpha["cvxpy"], axis=0).abs().max().to_dict())
+    print("Warm start statistics")
+    print(pd.DataFrame(sequence.statistics).set_index("mtu"))
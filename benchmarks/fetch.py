@@ -0,0 +1,131 @@
+"""Throughput of the fetch-parse-store pipeline against the local JAO stand-in server.
+
+A stand-in server (benchmarks/jao_server.py) with synthetic responses of *cbcos* CBCOs per mtu
+is started in this process. For each scenario, i.e. combination of latency, bandwidth, error
+rate and window, the business days are downloaded with load_range into an empty cache. The
+throughput in mtus/s and MB/s (bytes served) is the one of the median of *repeat* runs. Runs
+failing (e.g. with more errors than retries) are counted. Results are written as JSON named after the
+current commit, pass an earlier result to compare:
+
+    python benchmarks/fetch.py --cbcos 1000 --days 2 --latency 0 0.2 --bandwidth 0 10 --error-rate 0 0.1
+    python benchmarks/fetch.py --compare benchmarks/results/fetch-<commit>.json
+"""
+import argparse
+import contextlib
+import datetime as dt
+import io
+import itertools
+import json
+import logging
+import platform
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from benchmarks.jao_server import JAOStandIn, create_server, synthetic_source
+from benchmarks.stages import git_commit
+from domain_viewer import storage
+from domain_viewer.data_processing import create_request_session, load_range
+
+def benchmark_fetch(stand_in, base_url, start, end, window, repeat):
+    """Time and throughput of *repeat* runs of load_range for [start, end) into empty caches.
+
+    Throughput is of the median run, requests and (injected) errors are summed over all runs.
+    """
+    runs, requests, errors, cache_dir = [], 0, 0, storage.DATA_DIR
+    for _ in range(repeat):
+        stand_in.reset()
+        request_session = create_request_session()
+        # The stand-in runs locally, proxies do not apply
+        request_session.trust_env = False
+        request_session.proxies.clear()
+        with tempfile.TemporaryDirectory() as data_dir, contextlib.redirect_stdout(io.StringIO()):
+            storage.DATA_DIR = Path(data_dir)
+            start_time = time.perf_counter()
+            try:
+                mtus = load_range(start, end, request_session, window=window, base_url=base_url)
+                runs.append({
+                    "time": time.perf_counter() - start_time, "mtus": len(mtus), "bytes": stand_in.statistics["bytes"]
+                })
+            except Exception as e:
+                logging.warning(f"Run failed: {e}")
+            finally:
+                storage.DATA_DIR = cache_dir
+        requests += stand_in.statistics["requests"]
+        errors += stand_in.statistics["errors"]
+    result = {"runs": len(runs), "failed": repeat - len(runs), "requests": requests, "errors": errors}
+    if not runs:
+        return result
+    median = sorted(runs, key=lambda r: r["time"])[len(runs)//2]
+    return {
+        **result, "mtus": median["mtus"], "bytes": median["bytes"],
+        "time_min": min(r["time"] for r in runs), "time_median": median["time"],
+        "mtus_per_s": median["mtus"]/median["time"], "MB_per_s": median["bytes"]/1e6/median["time"],
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cbcos", type=int, default=1000, help="CBCOs per mtu")
+    parser.add_argument("--start", default="2025-07-01", help="First business day")
+    parser.add_argument("--days", type=int, default=1, help="Business days to download")
+    parser.add_argument("--window", type=int, nargs="+", default=[1], help="Days per request")
+    parser.add_argument("--latency", type=float, nargs="+", default=[0], help="Latency in s")
+    parser.add_argument("--bandwidth", type=float, nargs="+", default=[0], help="Bandwidth in MB/s, 0 for unlimited")
+    parser.add_argument("--error-rate", type=float, nargs="+", default=[0], help="Share of failed requests")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario")
+    parser.add_argument("--output", default=str(ROOT.joinpath("benchmarks", "results")), help="Output directory")
+    parser.add_argument("--compare", default=None, help="Earlier result file to compare with")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    start = pd.Timestamp(args.start, tz="Europe/Berlin")
+    end = start + pd.DateOffset(days=args.days)
+    stand_in = JAOStandIn(synthetic_source(args.cbcos), cache_mtus=args.days*25)
+    server = create_server("127.0.0.1", 0, stand_in)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    # Generate the synthetic responses before timing
+    for mtu in stand_in.mtus(start, end):
+        stand_in.fragments(mtu)
+
+    results = []
+    scenarios = itertools.product(args.window, args.latency, args.bandwidth, args.error_rate)
+    for window, latency, bandwidth, error_rate in scenarios:
+        stand_in.latency, stand_in.bandwidth, stand_in.error_rate = latency, bandwidth*1e6 or None, error_rate
+        print(f"Benchmarking window {window} d, latency {latency} s, bandwidth {bandwidth} MB/s, error rate {error_rate}")
+        result = benchmark_fetch(stand_in, base_url, start, end, dt.timedelta(days=window), args.repeat)
+        results.append({
+            "window": window, "latency": latency, "bandwidth": bandwidth, "error_rate": error_rate, **result
+        })
+    server.shutdown()
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created": dt.datetime.now().isoformat(timespec="seconds"),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "config": {"cbcos": args.cbcos, "start": args.start, "days": args.days, "repeat": args.repeat},
+        "results": results,
+    }
+    filepath = Path(args.output).joinpath(f"fetch-{commit[:12]}.json")
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    filepath.write_text(json.dumps(report, indent=2))
+
+    scenario = ["window", "latency", "bandwidth", "error_rate"]
+    results = pd.DataFrame(results).set_index(scenario)
+    print(results.round(3).to_string())
+    print(f"Written {filepath}")
+
+    if args.compare:
+        previous = json.loads(Path(args.compare).read_text())
+        baseline = pd.DataFrame(previous["results"]).set_index(scenario)
+        columns = ["mtus_per_s", "MB_per_s"]
+        print(f"Ratio to {previous['commit'][:12]} (> 1 is an improvement)")
+        print((results[columns]/baseline[columns]).reindex(results.index).dropna(how="all").round(2))
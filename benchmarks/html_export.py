@@ -0,0 +1,76 @@
+"""Compare size and parse time of the default and the compact html export of a domain plot.
+
+Run from the repository root, data is loaded from (or downloaded into) the cache:
+
+    python benchmarks/html_export.py 2025-07-07 19 --pair DE-FR:DE-AT --hover-points 5
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from domain_viewer.batch import parse_pair
+from domain_viewer.data_processing import load_data, ZONES, PLOT_COLUMNS, create_request_session, prepare_exchange
+from domain_viewer.extended_lta_inclusion import calculate_FB_exchange, correct_domain
+from domain_viewer.fbmc_domain import FBDomainPlots
+from domain_viewer.fbmc_domain_plot import create_fb_domain_plot
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("date", help="Business day, e.g. 2025-07-07")
+    parser.add_argument("hour", type=int, help="Hour in CET")
+    parser.add_argument("--pair", default="DE-FR:DE-AT", help="Axis pair, e.g. DE-FR:DE-AT")
+    parser.add_argument("--hover-points", type=int, default=None, help="Hover points per line of the compact export")
+    args = parser.parse_args()
+
+    request_session = create_request_session()
+    mtu = pd.Timestamp(args.date).tz_localize("Europe/Berlin") + pd.Timedelta(hours=args.hour)
+    domain_x, domain_y = parse_pair(args.pair)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        data = load_data(mtu, request_session, columns=PLOT_COLUMNS)
+        mcp = data["mcp"].loc[mtu.isoformat()]
+        exchange = prepare_exchange(data["exchange"], mcp, mtu)
+        eli_exchange, _, ram_correction, alpha = calculate_FB_exchange(
+            data["domain"], data["lta"], ZONES, mcp, exchange, backend="highs"
+        )
+        fbmc = FBDomainPlots(ZONES, correct_domain(data["domain"], ram_correction, alpha))
+
+    exports = {
+        "default": ({"steps": 20}, {}),
+        "compact": ({"steps": 2}, {"compact": True, "hover_points": args.hover_points}),
+    }
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, (domain_kwargs, plot_kwargs) in exports.items():
+            with contextlib.redirect_stdout(io.StringIO()):
+                start_time = time.perf_counter()
+                fb_domain = fbmc.generate_flowbased_domain(
+                    domain_x, domain_y, mtu, exchange=eli_exchange, **domain_kwargs
+                )
+                fig = create_fb_domain_plot(fb_domain, eli_exchange, ZONES, None, alpha, **plot_kwargs)
+                filepath = os.path.join(tmp_dir, f"{name}.html")
+                fig.write_html(filepath, full_html=False, include_plotlyjs="cdn")
+                build_time = time.perf_counter() - start_time
+            # Parsing the figure JSON as proxy for the parse time in the browser
+            fig_json = fig.to_json()
+            parse_time = min(timeit.repeat(lambda: json.loads(fig_json), number=1, repeat=5))
+            results.append({
+                "export": name, "lines": len(fb_domain.domain_data),
+                "size_MB": os.path.getsize(filepath)/1e6, "build_time": build_time,
+                "parse_time": parse_time,
+            })
+
+    results = pd.DataFrame(results).set_index("export")
+    print(results.round(4))
+    reduction = results.loc["default"] / results.loc["compact"]
+    print(f"Compact export is {reduction.size_MB:.1f}x smaller and parses {reduction.parse_time:.1f}x faster")
@@ -0,0 +1,88 @@
+"""Cold-start import time of the domain viewer entry points.
+
+Each target is imported in a fresh interpreter (repeated *repeat* times), the time of the
+import and the heavy dependencies it loaded are recorded. The targets correspond to the
+subcommands of domain_viewer.cli, the dependencies of each should only be loaded on first use.
+Results are written as JSON named after the current commit, pass an earlier result to compare:
+
+    python benchmarks/imports.py
+    python benchmarks/imports.py --compare benchmarks/results/imports-<commit>.json
+"""
+import argparse
+import datetime as dt
+import json
+import platform
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from benchmarks.stages import git_commit
+
+TARGETS = {
+    "pandas": "import pandas",
+    "cli": "import domain_viewer.cli",
+    "fetch": "from domain_viewer.data_processing import load_range",
+    "solve": "from domain_viewer.extended_lta_inclusion import calculate_FB_exchange",
+    "plot": "from domain_viewer.fbmc_domain import FBDomainPlots; from domain_viewer.fbmc_domain_plot import create_fb_domain_plot",
+    "main": "import main",
+}
+HEAVY = ["cvxpy", "plotly.graph_objects", "scipy.optimize", "scipy.spatial", "scipy.sparse", "cdd", "highspy", "requests", "pyarrow"]
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+{code}
+print(json.dumps({{"time": time.perf_counter() - start, "modules": [m for m in {heavy} if m in sys.modules]}}))
+"""
+
+def import_time(code, repeat):
+    """Best and median import time of *code* in fresh interpreters and the heavy modules loaded"""
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", SCRIPT.format(code=code, heavy=HEAVY)],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.splitlines()[-1])
+        times.append(result["time"])
+    return {"time_min": min(times), "time_median": statistics.median(times), "modules": " ".join(result["modules"])}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", nargs="+", default=list(TARGETS), help="Targets, by default all")
+    parser.add_argument("--repeat", type=int, default=5, help="Interpreters per target")
+    parser.add_argument("--output", default=str(ROOT.joinpath("benchmarks", "results")), help="Output directory")
+    parser.add_argument("--compare", default=None, help="Earlier result file to compare with")
+    args = parser.parse_args()
+
+    results = [{"target": target, **import_time(TARGETS[target], args.repeat)} for target in args.targets]
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created": dt.datetime.now().isoformat(timespec="seconds"),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "config": {"repeat": args.repeat},
+        "results": results,
+    }
+    filepath = Path(args.output).joinpath(f"imports-{commit[:12]}.json")
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    filepath.write_text(json.dumps(report, indent=2))
+
+    results = pd.DataFrame(results).set_index("target")
+    with pd.option_context("display.max_colwidth", 80):
+        print(results.round(3))
+    print(f"Written {filepath}")
+
+    if args.compare:
+        previous = json.loads(Path(args.compare).read_text())
+        baseline = pd.DataFrame(previous["results"]).set_index("target")
+        columns = ["time_min", "time_median"]
+        print(f"Ratio to {previous['commit'][:12]} (< 1 is an improvement)")
+        print((results[columns]/baseline[columns]).reindex(results.index).dropna(how="all").round(2))
@@ -0,0 +1,197 @@
+"""Local stand-in for the JAO Publication Tool API, replaying recorded or synthetic responses.
+
+The endpoints of ENDPOINTS (finalComputation, netPos, lta, ltn, scheduledExchanges) are served
+at /{endpoint} for the query parameters fromUtc and toUtc, the JAO base URL is replaced by the
+address of the server (JAO_BASE_URL or --base-url of the cli):
+
+    python benchmarks/jao_server.py --port 8060 --cbcos 5000 --latency 0.2 --bandwidth 10
+    python -m domain_viewer --base-url http://127.0.0.1:8060 fetch 2025-07-01
+
+Responses are generated by benchmarks/synthetic.py or replayed from a directory recorded from
+the live API with --record (one file per endpoint and business day). Latency (before the
+response), bandwidth (MB/s per response) and errors (share of requests answered with
+*error_status*) are injected on demand, they are attributes of the :class:`JAOStandIn` of the
+server and can be changed while it runs.
+"""
+import argparse
+import datetime as dt
+import functools
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from benchmarks.synthetic import synthetic_payloads
+from domain_viewer.data_processing import (
+    ENDPOINTS, TIMEZONE, create_request_session, get_url, parse_mtu, request_params
+)
+
+TABLES = {endpoint: table for table, endpoint in ENDPOINTS.items()}
+logger = logging.getLogger(__name__)
+
+def records_fragment(payload):
+    """Records of a payload of the form {"data": [...]} as JSON text without the brackets"""
+    return payload[payload.index("[") + 1:payload.rindex("]")].strip()
+
+def synthetic_source(cbcos=1000, seed=0, **kwargs):
+    """Source of synthetic records, each mtu with its own seed, see :func:`synthetic_payloads`"""
+    def source(mtu):
+        payloads = synthetic_payloads(mtu, cbcos=cbcos, seed=seed + int(mtu.timestamp()//3600), **kwargs)
+        return {k: records_fragment(v) for k, v in payloads.items()}
+    return source
+
+def recorded_source(directory):
+    """Source of the records recorded by :func:`record` into *directory*"""
+    @functools.lru_cache(maxsize=8)
+    def business_day(table, day):
+        path = Path(directory).joinpath(table, f"{day}.json")
+        records = json.loads(path.read_bytes())["data"] if path.is_file() else []
+        fragments = {}
+        for r in records:
+            fragments.setdefault(pd.Timestamp(r["dateTimeUtc"]), []).append(json.dumps(r))
+        return {t: ",".join(f) for t, f in fragments.items()}
+    def source(mtu):
+        return {k: business_day(k, mtu.strftime("%Y-%m-%d")).get(mtu.tz_convert("UTC"), "") for k in ENDPOINTS}
+    return source
+
+def record(start, end, directory, request_session=None, base_url=None):
+    """Record the responses of all endpoints for the business days in [start, end) into *directory*"""
+    request_session = request_session or create_request_session()
+    for day in pd.date_range(start, end, freq="D", inclusive="left"):
+        for table, endpoint in ENDPOINTS.items():
+            response = request_session.get(
+                get_url(endpoint, base_url), params=request_params(day, day + dt.timedelta(days=1)),
+                verify=False, proxies=request_session.proxies
+            )
+            response.raise_for_status()
+            path = Path(directory).joinpath(table, f"{day.strftime('%Y-%m-%d')}.json")
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(response.content)
+            logger.info(f"Recorded {endpoint} {day.strftime('%Y-%m-%d')} ({len(response.content)/1e6:.1f} MB)")
+
+class JAOStandIn():
+    """Responses of the JAO endpoints from *source* with injected latency, bandwidth and errors.
+
+    *source* returns the records of an mtu as JSON text for each table (the keys of ENDPOINTS),
+    see :func:`synthetic_source` and :func:`recorded_source`. The records of each mtu are cached
+    (up to *cache_mtus* mtus), responses for windows of many mtus are joined from them.
+    *latency* is in s, *bandwidth* in bytes/s per response (None for unlimited).
+    """
+    def __init__(self, source, latency=0, bandwidth=None, error_rate=0, error_status=503,
+                 cache_mtus=168, seed=0):
+        self.fragments = functools.lru_cache(maxsize=cache_mtus)(source)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.statistics = {"requests": 0, "errors": 0, "bytes": 0}
+
+    def count(self, **kwargs):
+        with self.lock:
+            for k, v in kwargs.items():
+                self.statistics[k] += v
+
+    def mtus(self, start, end):
+        return pd.date_range(start.tz_convert(TIMEZONE), end.tz_convert(TIMEZONE), freq="h", inclusive="left")
+
+    def payload(self, table, start, end):
+        """Response body of *table* for [start, end)"""
+        fragments = [self.fragments(mtu)[table] for mtu in self.mtus(start, end)]
+        return ('{"data": [' + ",".join(f for f in fragments if f) + ']}').encode()
+
+    def failure(self):
+        """Status code of an injected error or None"""
+        with self.lock:
+            return self.error_status if self.random.random() < self.error_rate else None
+
+class JAORequestHandler(BaseHTTPRequestHandler):
+    """Serve the endpoints of the :class:`JAOStandIn` of the server, see the module docstring"""
+    chunk_size = 1 << 16
+
+    def do_GET(self):
+        stand_in = self.server.stand_in
+        url = urlparse(self.path)
+        endpoint = url.path.rstrip("/").rsplit("/", 1)[-1]
+        stand_in.count(requests=1)
+        time.sleep(stand_in.latency)
+        if endpoint not in TABLES:
+            self.send_error(404, f"Unknown endpoint {endpoint}")
+            return
+        status_code = stand_in.failure()
+        if status_code is not None:
+            stand_in.count(errors=1)
+            self.send_error(status_code, "Injected error")
+            return
+        try:
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            body = stand_in.payload(TABLES[endpoint], parse_mtu(query["fromUtc"]), parse_mtu(query["toUtc"]))
+        except (KeyError, ValueError) as e:
+            self.send_error(400, str(e))
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        # Throttle to the bandwidth, measured from the start of the body
+        start = time.perf_counter()
+        for i in range(0, len(body), self.chunk_size):
+            self.wfile.write(body[i:i + self.chunk_size])
+            if stand_in.bandwidth:
+                time.sleep(max(0, start + (i + self.chunk_size)/stand_in.bandwidth - time.perf_counter()))
+        stand_in.count(bytes=len(body))
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+def create_server(host="127.0.0.1", port=8060, stand_in=None, **kwargs):
+    """HTTP server of a :class:`JAOStandIn`, kwargs are passed to it (with a synthetic source)"""
+    server = ThreadingHTTPServer((host, port), JAORequestHandler)
+    server.daemon_threads = True
+    server.stand_in = stand_in or JAOStandIn(synthetic_source(), **kwargs)
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8060)
+    parser.add_argument("--cbcos", type=int, default=1000, help="CBCOs per mtu of synthetic domains")
+    parser.add_argument("--recorded", default=None, help="Replay the responses recorded into this directory")
+    parser.add_argument("--latency", type=float, default=0, help="Latency of each response in s")
+    parser.add_argument("--bandwidth", type=float, default=None, help="Bandwidth of each response in MB/s")
+    parser.add_argument("--error-rate", type=float, default=0, help="Share of requests answered with an error")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--record", nargs=2, default=None, metavar=("START", "END"),
+                        help="Record the business days START to END (inclusive) from the JAO API into --recorded")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.record:
+        if not args.recorded:
+            parser.error("--record requires --recorded")
+        start, end = (parse_mtu(d).normalize() for d in args.record)
+        record(start, end + dt.timedelta(days=1), args.recorded)
+        sys.exit()
+
+    source = recorded_source(args.recorded) if args.recorded else synthetic_source(args.cbcos)
+    stand_in = JAOStandIn(
+        source, latency=args.latency, bandwidth=args.bandwidth and args.bandwidth*1e6,
+        error_rate=args.error_rate, error_status=args.error_status
+    )
+    server = create_server(args.host, args.port, stand_in)
+    logger.info(f"Serving the JAO stand-in on http://{args.host}:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,147 @@
+"""Time and peak memory of each stage of the domain pipeline on synthetic domains.
+
+Domains of the given sizes are generated by benchmarks/synthetic.py, no JAO data is required.
+Each stage is timed (best and median of *repeat* runs) and its peak memory is traced in a
+separate run with tracemalloc, which slows down allocations. Results are written as JSON named
+after the current commit, pass an earlier result to compare:
+
+    python benchmarks/stages.py --cbcos 1000 10000 100000
+    python benchmarks/stages.py --cbcos 1000 10000 100000 --compare benchmarks/results/stages-<commit>.json
+"""
+import argparse
+import contextlib
+import datetime as dt
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from benchmarks.synthetic import synthetic_responses
+from domain_viewer.batch import VOLUME_KWARGS
+from domain_viewer.data_processing import ZONES, expand_iva, process_final_computation, process_mcp, process_lta, process_exchange, prepare_exchange
+from domain_viewer.extended_lta_inclusion import calculate_FB_exchange, correct_domain
+from domain_viewer.fbmc_domain import FBDomainPlots
+from domain_viewer.fbmc_domain_plot import create_fb_domain_plot
+
+def git_commit():
+    """Commit hash of the working tree, suffixed with -dirty if there are uncommitted changes"""
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    commit = git("rev-parse", "HEAD") or "unknown"
+    return commit + ("-dirty" if git("status", "--porcelain", "--untracked-files=no") else "")
+
+def measure(stage, repeat):
+    """Best and median time of *repeat* runs of *stage* and its traced peak memory"""
+    times = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        result = stage()
+        times.append(time.perf_counter() - start_time)
+    tracemalloc.start()
+    stage()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {"time_min": min(times), "time_median": statistics.median(times), "peak_memory_MB": peak/1e6}
+
+def benchmark_stages(cbcos, domain_x, domain_y, repeat=3, iva_share=0.05, seed=0, backend="highs"):
+    """Run all stages for a synthetic domain with *cbcos* CBCOs, returns a list of results"""
+    mtu = pd.Timestamp("2025-07-07 19:00").tz_localize("Europe/Berlin")
+    responses = synthetic_responses(mtu, cbcos=cbcos, iva_share=iva_share, seed=seed)
+    mcp = process_mcp(responses["mcp"], mtu).loc[mtu.isoformat()]
+    lta = process_lta(responses["lta"], mtu)
+    exchange = prepare_exchange(process_exchange(responses["exchange"], mtu), mcp, mtu)
+
+    results = []
+    def run(name, stage):
+        result, measurement = measure(stage, repeat)
+        results.append({"cbcos": cbcos, "stage": name, **measurement})
+        return result
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        domain = run("process_final_computation", lambda: process_final_computation(responses["domain"], mtu))
+        domain = expand_iva(domain)
+        eli_exchange, _, ram_correction, alpha = run(
+            "calculate_FB_exchange",
+            lambda: calculate_FB_exchange(domain.copy(), lta, ZONES, mcp, exchange, backend=backend)
+        )
+        fbmc = FBDomainPlots(ZONES, correct_domain(domain, ram_correction, alpha))
+        domain_info = fbmc.domain_information([(domain_x, domain_y)], mtu)
+        A, b = domain_info[ZONES].values, domain_info.ram.values
+
+        A_hat = run("zonal_ptdf_projection", lambda: fbmc.zonal_ptdf_projection(domain_x, domain_y, A))
+        run("create_feasible_region_vertices", lambda: fbmc.create_feasible_region_vertices(A_hat, b))
+        # Synthetic domains are bounded, the volume is computed as in the batch with --volume
+        run("feasible_region_volume", lambda: fbmc.feasible_region_volume(domain_info, **VOLUME_KWARGS))
+
+        fb_domain = fbmc.generate_flowbased_domain(domain_x, domain_y, mtu)
+        plot_limits = ((fb_domain.x_max, fb_domain.x_min), (fb_domain.y_max, fb_domain.y_min))
+        run(
+            "create_domain_plot",
+            lambda: fbmc.create_domain_plot(A_hat, b, fb_domain.domain_data.index.values, plot_limits)
+        )
+        run(
+            "create_fb_domain_plot",
+            lambda: create_fb_domain_plot(fb_domain, eli_exchange, ZONES, None, alpha, show_plot=False)
+        )
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cbcos", type=int, nargs="+", default=[1000, 10000, 100000], help="Domain sizes")
+    parser.add_argument("--pair", default="DE-FR:DE-AT", help="Axis pair, e.g. DE-FR:DE-AT")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage")
+    parser.add_argument("--iva-share", type=float, default=0.05, help="Share of CBCOs with IVA")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", default="highs", help="ELI backend of calculate_FB_exchange")
+    parser.add_argument("--output", default=str(ROOT.joinpath("benchmarks", "results")), help="Output directory")
+    parser.add_argument("--compare", default=None, help="Earlier result file to compare with")
+    args = parser.parse_args()
+
+    domain_x, domain_y = [zones.split("-") for zones in args.pair.split(":")]
+    results = []
+    for cbcos in args.cbcos:
+        print(f"Benchmarking {cbcos} CBCOs")
+        results += benchmark_stages(
+            cbcos, domain_x, domain_y, args.repeat, args.iva_share, args.seed, args.backend
+        )
+
+    # Time of the (optional) volume estimate relative to all other stages
+    times = pd.DataFrame(results).set_index(["cbcos", "stage"]).time_median.unstack()
+    volume_overhead = times["feasible_region_volume"] / times.drop(columns="feasible_region_volume").sum(axis=1)
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created": dt.datetime.now().isoformat(timespec="seconds"),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "config": {k: v for k, v in vars(args).items() if k not in ["output", "compare"]},
+        "results": results,
+        "volume_overhead": {str(k): v for k, v in volume_overhead.items()},
+    }
+    filepath = Path(args.output).joinpath(f"stages-{commit[:12]}.json")
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    filepath.write_text(json.dumps(report, indent=2))
+
+    results = pd.DataFrame(results).set_index(["cbcos", "stage"])
+    print(results.round(4))
+    print("Volume estimate relative to all other stages", volume_overhead.round(1).to_dict())
+    print(f"Written {filepath}")
+
+    if args.compare:
+        previous = json.loads(Path(args.compare).read_text())
+        baseline = pd.DataFrame(previous["results"]).set_index(["cbcos", "stage"])
+        print(f"Ratio to {previous['commit'][:12]} (< 1 is an improvement)")
+        print((results/baseline).reindex(results.index).dropna(how="all").round(2))
@@ -0,0 +1,152 @@
+"""Synthetic JAO Publication Tool data of configurable size, to benchmark without live data.
+
+The payloads mimic the JAO endpoints (see ENDPOINTS in domain_viewer.data_processing) and are
+processed by the regular process_* functions, i.e. the resulting tables have the shapes of
+process_final_computation, process_mcp, process_lta, process_ltn and process_exchange.
+
+The domain consists of CNEs, each monitored in the basecase and under a number of contingencies
+with slightly perturbed PTDFs, as in the published domains. As in the CORE domains, a minimum and
+maximum net position row per zone bounds the domain in all directions. RAMs are chosen such that
+the market clearing point lies within the domain.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+from domain_viewer.data_processing import (
+    ZONES, ENDPOINTS, process_final_computation, process_mcp, process_lta, process_ltn, process_exchange
+)
+
+# Borders of the CORE region with scheduled exchange and LTAs, Alegro (ALBE/ALDE) is added from
+# the net positions by add_alegro_exchange
+BORDERS = [
+    ("AT", "CZ"), ("AT", "DE"), ("AT", "HU"), ("AT", "SI"), ("BE", "DE"), ("BE", "FR"), ("BE", "NL"),
+    ("CZ", "DE"), ("CZ", "PL"), ("CZ", "SK"), ("DE", "FR"), ("DE", "NL"), ("DE", "PL"), ("HR", "HU"),
+    ("HR", "SI"), ("HU", "RO"), ("HU", "SI"), ("HU", "SK"), ("PL", "SK"),
+]
+TSOS = ["50HERTZ", "AMPRION", "APG", "CEPS", "ELIA", "ELES", "HOPS", "MAVIR", "PSE", "RTE", "SEPS",
+        "TENNET_BV", "TENNET_GMBH", "TRANSELECTRICA", "TRANSNETBW"]
+
+class SyntheticResponse():
+    """Stand-in for the requests.Response of a JAO endpoint, json() parses the payload"""
+    def __init__(self, content):
+        self.content = content.encode() if isinstance(content, str) else content
+        self.status_code = 200
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+def border_payload(mtu_utc, values):
+    """Payload of a border endpoint (lta, ltn, scheduledExchanges) with one value per border"""
+    row = {"id": 0, "dateTimeUtc": mtu_utc}
+    for (a, b), value in values.items():
+        row[f"border_{a}_{b}"] = float(value)
+    return json.dumps({"data": [row]})
+
+def synthetic_payloads(mtu, cbcos=1000, iva_share=0.05, contingencies=20, seed=0):
+    """JSON payloads of all endpoints for one *mtu* with *cbcos* CBCOs.
+
+    Parameters
+    ----------
+    mtu : pd.Timestamp
+        Market time unit, tz aware.
+    cbcos : int
+        Number of presolved CBCOs before IVA rows are added (see expand_iva), plus a minimum
+        and maximum net position row per zone.
+    iva_share : float
+        Share of CBCOs with an individual validation adjustment.
+    contingencies : int
+        Contingencies per CNE, each CNE also appears in the basecase.
+
+    Returns
+    -------
+    dict of str, mapping the table names of ENDPOINTS to the JSON payload.
+    """
+    rng = np.random.default_rng(seed)
+    mtu_utc = mtu.tz_convert("UTC").strftime("%Y-%m-%dT%H:%M:%SZ")
+    core = [z for z in ZONES if z not in ["ALBE", "ALDE"]]
+
+    # Market clearing point, net positions are balanced by the exchanges
+    flows = rng.uniform(-1500, 1500, len(BORDERS))
+    exchange = {}
+    for (a, b), flow in zip(BORDERS, flows):
+        exchange[(a, b)], exchange[(b, a)] = max(flow, 0), max(-flow, 0)
+    net_position = pd.Series(0.0, index=ZONES)
+    for (a, b), flow in zip(BORDERS, flows):
+        net_position[a] += flow
+        net_position[b] -= flow
+    alegro = rng.uniform(-1000, 1000)
+    net_position["ALBE"], net_position["ALDE"] = alegro, -alegro
+
+    # Zonal PTDF of each CNE, mainly sensitive to the exchange over one border
+    cnes = max(1, int(np.ceil(cbcos/(contingencies + 1))))
+    cne_ptdf = rng.normal(0, 0.03, (cnes, len(ZONES)))
+    border = rng.integers(len(BORDERS), size=cnes)
+    sensitivity = rng.uniform(0.05, 0.4, cnes)
+    for i, (a, b) in enumerate(BORDERS):
+        cne_ptdf[border == i, ZONES.index(a)] += sensitivity[border == i]
+        cne_ptdf[border == i, ZONES.index(b)] -= sensitivity[border == i]
+
+    cne = np.arange(cbcos) % cnes
+    contingency = np.arange(cbcos) // cnes
+    ptdf = cne_ptdf[cne] + (contingency > 0)[:, None]*rng.normal(0, 0.01, (cbcos, len(ZONES)))
+    ram = np.dot(ptdf, net_position.values) + rng.uniform(50, 1500, cbcos)
+    ram = np.maximum(ram, 10)
+    cne_names = [f"CNE_{i}" for i in cne]
+    direction = np.where(cne % 2 == 0, "DIRECT", "OPPOSITE")
+
+    # Minimum and maximum net position of each zone, -NP_z <= RAM and NP_z <= RAM, with positive 
+    # RAMs so that the origin (no exchange) is inside the domain like the net position
+    np_ptdf = np.vstack([-np.eye(len(ZONES)), np.eye(len(ZONES))])
+    ptdf = np.vstack([ptdf, np_ptdf])
+    ram = np.r_[ram, np.abs(np.dot(np_ptdf, net_position.values)) + rng.uniform(2000, 6000, 2*len(ZONES))]
+    cne_names += [f"{limit}_NP_{z}" for limit in ["MIN", "MAX"] for z in ZONES]
+    contingency = np.r_[contingency, np.zeros(2*len(ZONES), dtype=int)]
+    direction = np.r_[direction, np.full(2*len(ZONES), "DIRECT")]
+    cbcos += 2*len(ZONES)
+    iva = np.where(rng.random(cbcos) < iva_share, rng.uniform(10, 100, cbcos), 0).round(1)
+
+    domain = pd.DataFrame({
+        "id": np.arange(cbcos),
+        "dateTimeUtc": mtu_utc,
+        "tso": np.array(TSOS)[rng.integers(len(TSOS), size=cbcos)],
+        "cneName": cne_names,
+        "contName": [None if c == 0 else f"CO_{c}" for c in contingency],
+        "direction": direction,
+        "presolved": True,
+        "iva": iva,
+        "ram": ram.round(1),
+        "fmax": (ram + rng.uniform(100, 1000, cbcos)).round(1),
+        **{f"ptdf_{z}": ptdf[:, j].round(5) for j, z in enumerate(ZONES)},
+    })
+    lta = {(a, b): rng.uniform(100, 800) for a, b in BORDERS + [(b, a) for a, b in BORDERS]}
+    ltn = {k: rng.uniform(0, 0.5)*v for k, v in lta.items()}
+    mcp = {"id": 0, "dateTimeUtc": mtu_utc, **{f"hub_{z}": float(net_position[z]) for z in ZONES}}
+    return {
+        "domain": '{"data": ' + domain.to_json(orient="records") + '}',
+        "mcp": json.dumps({"data": [mcp]}),
+        "lta": border_payload(mtu_utc, lta),
+        "ltn": border_payload(mtu_utc, ltn),
+        "exchange": border_payload(mtu_utc, {k: v for k, v in exchange.items() if k[0] in core}),
+    }
+
+def synthetic_responses(mtu, **kwargs):
+    """Responses of all endpoints, see :func:`synthetic_payloads` for kwargs"""
+    return {k: SyntheticResponse(v) for k, v in synthetic_payloads(mtu, **kwargs).items()}
+
+def synthetic_data(mtu, **kwargs):
+    """Processed tables of all endpoints, as returned by fetch_data"""
+    process = {
+        "domain": process_final_computation,
+        "mcp": process_mcp,
+        "lta": process_lta,
+        "ltn": process_ltn,
+        "exchange": process_exchange,
+    }
+    responses = synthetic_responses(mtu, **kwargs)
+    return {k: process[k](responses[k], mtu) for k in ENDPOINTS}
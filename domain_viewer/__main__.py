@@ -0,0 +1,3 @@
+from domain_viewer.cli import main
+
+main()
@@ -0,0 +1,223 @@
+"""Batch processing of flow-based domains for many mtus and axis pairs.
+
+For every mtu in a date range the pipeline load -> Alegro exchange -> ELI -> flow-based
+domains is run in a process pool. Results are written as parquet datasets into the output
+directory:
+
+    python -m domain_viewer.batch 2025-07-01 2025-07-02 --pairs DE-FR:DE-AT DE-NL:DE-BE
+
+"""
+import argparse
+import datetime as dt
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from domain_viewer import metrics
+from domain_viewer.data_processing import (
+    ZONES, PLOT_COLUMNS, TIMEZONE, load_data_from_db, load_range, prepare_exchange
+)
+from domain_viewer.extended_lta_inclusion import ELISequence, correct_domain
+from domain_viewer.fbmc_domain import FBDomainPlots, NotAPolytopeError
+
+RESULT_TABLES = ["vertices", "active_cbcos", "alpha", "eli_flows", "timing", "failed"]
+# Target relative standard error of the volume estimate, see domain_viewer.volume.estimate_volume
+VOLUME_KWARGS = {"error": 0.03}
+
+logger = logging.getLogger(__name__)
+
+# Solver instance of each worker process, created by init_worker
+_worker = {}
+
+def init_worker(zones, metrics_dir=None):
+    """Create the ELI solver of a worker process, re-used (and warm-started) for all its mtus.
+
+    Progress messages of the workers are silenced, warnings are logged. With *metrics_dir* 
+    the spans of the worker are written to metrics_dir/worker-{pid}.jsonl.
+    """
+    logging.getLogger("domain_viewer").setLevel(logging.WARNING)
+    _worker["eli"] = ELISequence(zones)
+    if metrics_dir is not None:
+        metrics.add_sink(metrics.JSONLinesSink(Path(metrics_dir).joinpath(f"worker-{os.getpid()}.jsonl")))
+
+def process_mtu(mtu, pairs, shift_mcp=True, volume=False):
+    """Run the pipeline for one mtu and return the results as dict of DataFrames"""
+    timing = []
+    def record(stage, start_time, **kwargs):
+        timing.append({"stage": stage, "time": time.perf_counter() - start_time, **kwargs})
+
+    start_time = time.perf_counter()
+    data = load_data_from_db(mtu, columns=PLOT_COLUMNS)
+    domain = data["domain"]
+    mcp = data["mcp"].loc[mtu.isoformat()]
+    record("load", start_time)
+
+    start_time = time.perf_counter()
+    exchange = prepare_exchange(data["exchange"], mcp, mtu)
+    record("add_alegro_exchange", start_time)
+
+    start_time = time.perf_counter()
+    eli_exchange, _, ram_correction, alpha = _worker["eli"].solve(
+        domain, data["lta"], mcp, exchange, mtu=mtu.isoformat()
+    )
+    domain = correct_domain(domain, ram_correction, alpha)
+    record("calculate_FB_exchange", start_time)
+
+    start_time = time.perf_counter()
+    fbmc = FBDomainPlots(ZONES, domain)
+    fb_domains = fbmc.generate_flowbased_domains(
+        pairs, mtu=mtu, exchange=eli_exchange if shift_mcp else None
+    )
+    record("generate_flowbased_domains", start_time, pairs=len(pairs))
+
+    domain_volume, volume_error = np.nan, np.nan
+    if volume:
+        start_time = time.perf_counter()
+        try:
+            domain_volume, volume_error = fbmc.feasible_region_volume(
+                fbmc.domain_information(pairs, mtu), return_error=True, **VOLUME_KWARGS
+            )
+        except NotAPolytopeError:
+            logger.warning(f"Domain of {mtu.isoformat()} is unbounded, volume is NaN")
+        record("domain_volume", start_time)
+
+    vertices, active_cbcos = [], []
+    for (domain_x, domain_y), fb_domain in zip(pairs, fb_domains):
+        pair = {"domain_x": ">".join(domain_x), "domain_y": ">".join(domain_y)}
+        vertices.append(pd.DataFrame({
+            **pair,
+            "vertex": np.arange(len(fb_domain.feasible_region_vertices)),
+            "x": fb_domain.feasible_region_vertices[:, 0],
+            "y": fb_domain.feasible_region_vertices[:, 1],
+        }))
+        constraints = fb_domain.constraint_data
+        active = constraints.loc[constraints.in_domain, ["cb", "co", "tso", "ram"]]
+        active_cbcos.append(active.assign(**pair).reset_index(drop=True))
+
+    results = {
+        "vertices": pd.concat(vertices),
+        "active_cbcos": pd.concat(active_cbcos),
+        "alpha": pd.DataFrame({
+            "alpha": [float(alpha)], "cbcos": [len(domain)], 
+            "volume": [domain_volume], "volume_error": [volume_error],
+        }),
+        "eli_flows": eli_exchange.drop(columns="mtu").reset_index(),
+        "timing": pd.DataFrame(timing),
+    }
+    for df in results.values():
+        df.insert(0, "mtu", mtu.isoformat())
+    return results
+
+def failed_mtus(mtus, error):
+    """Result table of *mtus* that could not be processed because of *error*"""
+    return pd.DataFrame({"mtu": [mtu.isoformat() for mtu in mtus], "error": f"{type(error).__name__}: {error}"})
+
+def process_mtus(mtus, pairs, shift_mcp=True, volume=False):
+    """Run the pipeline for consecutive mtus in one worker.
+
+    An mtu that fails (e.g. an infeasible ELI problem or an unbounded domain) is logged and 
+    recorded in the failed table, the remaining mtus are processed.
+    """
+    results = []
+    for mtu in mtus:
+        try:
+            results.append(process_mtu(mtu, pairs, shift_mcp, volume))
+        except Exception as e:
+            logger.exception(f"Processing {mtu.isoformat()} failed")
+            results.append({"failed": failed_mtus([mtu], e)})
+    tables = {k: [r[k] for r in results if k in r] for k in RESULT_TABLES}
+    return {k: pd.concat(dfs) for k, dfs in tables.items() if dfs}
+
+def write_results(results, output_dir, part):
+    """Write one part of each result table to output_dir/{table}/part-{part}.parquet"""
+    for k, df in results.items():
+        path = Path(output_dir).joinpath(k, f"part-{part:05d}.parquet")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        df.reset_index(drop=True).to_parquet(path)
+
+def run_batch(start, end, pairs, output_dir="results", request_session=None, shift_mcp=True,
+              max_workers=None, chunk_size=6, volume=False, metrics_dir=None):
+    """Calculate flow-based domains for all mtus in [start, end) and all axis pairs.
+
+    Missing data is downloaded into the cache first (see :func:`load_range`). Then consecutive
+    mtus are processed in chunks of *chunk_size* by a process pool, each worker holds its own
+    warm-started ELI solver. At most two chunks per worker are in flight and each finished
+    chunk is written to the output directory right away, which bounds memory use independent
+    of the length of the date range. Mtus that fail, also if their worker fails, are logged and
+    listed with the error in the failed table.
+
+    Parameters
+    ----------
+    start, end : pd.Timestamp
+        Time range, mtus in [start, end) are processed.
+    pairs : list of (domain_x, domain_y)
+        Axis pairs, each a two element list of market areas, e.g. (["DE", "FR"], ["DE", "AT"]).
+    output_dir : str or pathlib.Path
+        Directory of the parquet results, one dataset per table in RESULT_TABLES.
+    volume : bool, optional
+        Estimate the volume of the full domain of each mtu (column volume of the alpha 
+        table, in MW^(zones - 1)) and its standard error (column volume_error), see 
+        VOLUME_KWARGS for the accuracy. The estimate takes longer than all other stages 
+        together (see benchmarks/stages.py), by default False. 
+    metrics_dir : str or pathlib.Path, optional
+        Write the timing and metrics spans of each worker as JSON lines into this directory,
+        see :mod:`domain_viewer.metrics`.
+    """
+    mtus = load_range(start, end, request_session)
+    chunks = [mtus[i:i + chunk_size] for i in range(0, len(mtus), chunk_size)]
+
+    max_workers = max_workers or os.cpu_count()
+    initargs = (ZONES, metrics_dir)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker, initargs=initargs) as executor:
+        max_in_flight = 2*max_workers
+        pending, part, failed = {}, 0, 0
+        def collect(futures):
+            nonlocal part, failed
+            for future in futures:
+                chunk = pending.pop(future)
+                try:
+                    results = future.result()
+                except Exception as e:
+                    logger.exception(f"Processing {chunk[0].isoformat()} to {chunk[-1].isoformat()} failed")
+                    results = {"failed": failed_mtus(chunk, e)}
+                failed += len(results.get("failed", []))
+                write_results(results, output_dir, part)
+                part += 1
+        for chunk in chunks:
+            if len(pending) >= max_in_flight:
+                collect(wait(pending, return_when=FIRST_COMPLETED).done)
+            pending[executor.submit(process_mtus, chunk, pairs, shift_mcp, volume)] = chunk
+        collect(wait(pending).done)
+    logger.info(f"Processed {len(mtus)} mtus ({failed} failed) in {part} parts, results in {output_dir}")
+
+def parse_pair(pair):
+    """Parse an axis pair of the form DE-FR:DE-AT"""
+    domain_x, domain_y = pair.split(":")
+    return domain_x.split("-"), domain_y.split("-")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calculate flow-based domains for a range of business days.")
+    parser.add_argument("start", help="First business day, e.g. 2025-07-01")
+    parser.add_argument("end", help="Last business day (inclusive)")
+    parser.add_argument("--pairs", nargs="+", default=["DE-FR:DE-AT"], help="Axis pairs, e.g. DE-FR:DE-AT")
+    parser.add_argument("--output", default="results", help="Output directory")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("--no-shift-mcp", action="store_true", help="Do not shift domains to the MCP")
+    parser.add_argument("--volume", action="store_true", help="Estimate the domain volume of each mtu")
+    parser.add_argument("--metrics", action="store_true", help="Write timing and metrics spans to output/metrics")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    start = pd.Timestamp(args.start).tz_localize(TIMEZONE)
+    end = (pd.Timestamp(args.end) + dt.timedelta(days=1)).tz_localize(TIMEZONE)
+    run_batch(
+        start, end, [parse_pair(p) for p in args.pairs], output_dir=args.output,
+        shift_mcp=not args.no_shift_mcp, max_workers=args.workers, volume=args.volume,
+        metrics_dir=Path(args.output).joinpath("metrics") if args.metrics else None
+    )
@@ -0,0 +1,100 @@
+"""Command line interface of the domain viewer.
+
+    python -m domain_viewer fetch 2025-07-01 2025-07-07
+    python -m domain_viewer solve 2025-07-07T19:00
+    python -m domain_viewer plot 2025-07-07T19:00 --x DE-FR --y DE-AT
+
+fetch downloads all mtus of the given business days into the cache, solve calculates the ELI
+flow components of an mtu and plot writes its domain as html file. Each subcommand imports only
+the modules it needs, e.g. solve does not import plotly and neither fetch nor solve import cvxpy
+(unless selected as ELI backend). Data is downloaded only if it is not cached.
+"""
+import argparse
+import datetime as dt
+import logging
+import os
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+def fetch(args):
+    import pandas as pd
+    from domain_viewer.data_processing import load_range, parse_mtu
+    start = parse_mtu(args.start).normalize()
+    # Calendar day, a business day with a DST change has 23 or 25 hours
+    end = parse_mtu(args.end or args.start).normalize() + pd.DateOffset(days=1)
+    mtus = load_range(start, end, None, window=dt.timedelta(days=args.window), force_reload=args.force)
+    logger.info(f"{len(mtus)} mtus cached from {start.isoformat()} to {end.isoformat()}")
+
+def solve_mtu(mtu, backend):
+    """Load *mtu* and calculate its ELI flow components, returns the data and ELI results"""
+    from domain_viewer.data_processing import ZONES, PLOT_COLUMNS, load_data, prepare_exchange
+    from domain_viewer.extended_lta_inclusion import calculate_FB_exchange
+    data = load_data(mtu, None, columns=PLOT_COLUMNS)
+    mcp = data["mcp"].loc[mtu.isoformat()]
+    exchange = prepare_exchange(data["exchange"], mcp, mtu)
+    eli = calculate_FB_exchange(data["domain"].copy(), data["lta"], ZONES, mcp, exchange, backend=backend)
+    return data, eli
+
+def solve(args):
+    from domain_viewer.data_processing import parse_mtu
+    _, (eli_exchange, _, _, alpha) = solve_mtu(parse_mtu(args.mtu), args.backend)
+    logger.info(f"alpha: {alpha:.4f}")
+    print(eli_exchange[eli_exchange.Flow.abs() > 1e-3].round(1).to_string())
+    if args.output:
+        eli_exchange.to_csv(args.output)
+        logger.info(f"Written {args.output}")
+
+def plot(args):
+    from domain_viewer.data_processing import ZONES, parse_axis, parse_mtu
+    from domain_viewer.extended_lta_inclusion import correct_domain
+    from domain_viewer.fbmc_domain import FBDomainPlots
+    from domain_viewer.fbmc_domain_plot import create_fb_domain_plot, write_domain_html
+    mtu = parse_mtu(args.mtu)
+    data, (eli_exchange, _, ram_correction, alpha) = solve_mtu(mtu, args.backend)
+    domain = correct_domain(data["domain"], ram_correction, alpha)
+    fb_domain = FBDomainPlots(ZONES, domain).generate_flowbased_domain(
+        parse_axis(args.x), parse_axis(args.y), mtu, exchange=None if args.no_shift else eli_exchange, steps=2
+    )
+    fig = create_fb_domain_plot(
+        fb_domain, eli_exchange, ZONES, None, alpha, show_plot=False, hover_points=5, compact=True
+    )
+    write_domain_html(fig, args.output, full_html=False, include_plotlyjs="cdn")
+    if args.open:
+        import webbrowser
+        webbrowser.open(f"file://{Path(args.output).resolve()}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m domain_viewer", description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default=None, help="JAO API base URL, e.g. of a local stand-in server")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    fetch_parser = subparsers.add_parser("fetch", help="Download business days into the cache")
+    fetch_parser.add_argument("start", help="First business day, e.g. 2025-07-01")
+    fetch_parser.add_argument("end", nargs="?", default=None, help="Last business day, by default start")
+    fetch_parser.add_argument("--window", type=int, default=1, help="Days per request")
+    fetch_parser.add_argument("--force", action="store_true", help="Download cached mtus again")
+    fetch_parser.set_defaults(func=fetch)
+
+    for name, func, help in [("solve", solve, "Calculate the ELI flow components of an mtu"),
+                             ("plot", plot, "Write the domain of an mtu as html file")]:
+        subparser = subparsers.add_parser(name, help=help)
+        subparser.add_argument("mtu", help="Local time, e.g. 2025-07-07T19:00")
+        subparser.add_argument("--backend", default="highs", help="ELI backend, highs or cvxpy")
+        subparser.set_defaults(func=func)
+    solve_parser, plot_parser = subparsers.choices["solve"], subparsers.choices["plot"]
+    solve_parser.add_argument("--output", default=None, help="Write the ELI exchange as csv")
+    plot_parser.add_argument("--x", default="DE-FR", help="Domain x-axis")
+    plot_parser.add_argument("--y", default="DE-AT", help="Domain y-axis")
+    plot_parser.add_argument("--no-shift", action="store_true", help="Do not shift to the market clearing point")
+    plot_parser.add_argument("--output", default="fb_domain.html")
+    plot_parser.add_argument("--open", action="store_true", help="Open the html file in the browser")
+
+    args = parser.parse_args(argv)
+    if args.base_url:
+        os.environ["JAO_BASE_URL"] = args.base_url
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
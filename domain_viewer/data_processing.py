@@ -1,30 +1,148 @@
 
 import pandas as pd
 import numpy as np
+import codecs
+import contextvars
 import datetime as dt
+import functools
 import json
-import urllib3
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from domain_viewer import metrics
+from domain_viewer.storage import is_cached, read_partition, write_partitions
+
+logger = logging.getLogger(__name__)
 ZONES = [
     'AT', 'BE', 'CZ', 'DE', 'FR', 'HR', 'HU', 
     'NL', 'PL', 'RO', 'SI', 'SK', 'ALBE', 'ALDE'
 ]
+TIMEZONE = "Europe/Berlin"
+# Columns of the domain table required by the ELI calculation and by FBDomainPlots
+ELI_COLUMNS = ZONES + ["ram"]
+PLOT_COLUMNS = ZONES + ["ram", "co", "iva", "cb", "tso"]
+# String columns of the domain table, stored as categoricals (dictionary-encoded in the cache)
+CATEGORICAL_COLUMNS = ["mtu", "cb", "co", "tso"]
+# The finalComputation payload is read and parsed in chunks of this size (bytes)
+CHUNK_SIZE = 1 << 21
+# JAO Publication Tool API, the environment variable JAO_BASE_URL overrides it (e.g. with a 
+# local stand-in server, see benchmarks/jao_server.py)
+BASE_URL = "https://publicationtool.jao.eu/core/api/data"
 
-def load_data(mtu, request_session, force_reload=False):
-    try:
-        df = pd.read_feather("data/domain.db", columns=["mtu"])
-        df = df[df["mtu"] == mtu.isoformat()]
-    except FileNotFoundError:
-        df = pd.DataFrame()
-    if df.empty or force_reload:
-        print("Download and to DB")
-        data = download_and_save_data(mtu, request_session)
-    else:
-        print("Load from DB")
-        data = load_data_from_db(mtu)
+def parse_mtu(mtu):
+    """Timestamp of an mtu string, local time (Europe/Berlin) unless it contains an offset"""
+    mtu = pd.Timestamp(mtu)
+    return mtu.tz_localize(TIMEZONE) if mtu.tz is None else mtu.tz_convert(TIMEZONE)
+
+def parse_axis(axis):
+    """Two market areas of an axis of the form DE-FR"""
+    zones = axis.split("-")
+    if len(zones) != 2 or not set(zones).issubset(ZONES):
+        raise ValueError(f"Invalid axis {axis}, expected two of {', '.join(ZONES)} like DE-FR")
+    return zones
+
+def create_request_session():
+    """Request session with the DomainViewer headers and the proxies from proxy.json (if it exists).
+
+    Requests failing with a transient error (429 or 5xx) are retried with exponential backoff.
+    """
+    import requests
+    import urllib3
+    from requests.adapters import HTTPAdapter
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    request_session = requests.Session()
+    request_session.headers.update({
+        'user-agent': 'riw@50Hertz',
+        'Authorization': 'DomainViewer'
+    })
+    retry = urllib3.util.Retry(
+        total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET"]
+    )
+    for prefix in ["http://", "https://"]:
+        request_session.mount(prefix, HTTPAdapter(max_retries=retry))
+    # Read Proxy File if it exists. 
+    if Path.cwd().joinpath("proxy.json").is_file():
+        with open(Path.cwd().joinpath("proxy.json"), 'r') as f:
+            proxy = json.load(f)
+        request_session.proxies.update(proxy)
+    return request_session
+
+def load_data(mtu, request_session, force_reload=False, columns=None):
+    """Load data for *mtu* from the cache or download it.
+
+    *columns* optionally restricts the domain table to the given columns (e.g. 
+    :data:`ELI_COLUMNS` or :data:`PLOT_COLUMNS`), the index and mtu are always included.
+    *request_session* may be None, a session is then only created if data is downloaded.
+    """
+    with metrics.span("load_data", mtu=mtu.isoformat()) as span:
+        if not is_cached(mtu) or force_reload:
+            logger.info("Download and to DB")
+            span.set(cache_hits=0, cache_misses=1)
+            data = download_and_save_data(mtu, request_session)
+            data["domain"] = expand_iva(data["domain"])
+            if columns is not None:
+                data["domain"] = data["domain"][["mtu"] + [c for c in columns if c != "mtu"]]
+        else:
+            logger.info("Load from DB")
+            span.set(cache_hits=1, cache_misses=0)
+            data = load_data_from_db(mtu, columns=columns)
+        span.set(rows=len(data["domain"]))
     return data
 
-def load_data_from_db(mtu):
+def load_range(start, end, request_session, window=dt.timedelta(days=1), force_reload=False, base_url=None):
+    """Download and cache all mtus in [start, end) with one request per endpoint and window.
+
+    Instead of requesting each hour individually, each JAO endpoint is queried once for a
+    time window of up to *window* length (e.g. a business day or a week). The payloads are
+    parsed once, split into their mtus and written to the cache in a single write. Already 
+    cached mtus are skipped unless *force_reload* is set. Afterwards :func:`load_data` 
+    serves each mtu from the cache. *base_url* is passed to :func:`get_url`.
+
+    Returns
+    -------
+    mtus : pd.DatetimeIndex
+        All mtus of the requested range. 
+    """
+    with metrics.span("load_range", start=start.isoformat(), end=end.isoformat()) as span:
+        mtus = pd.date_range(start, end, freq="h", inclusive="left")
+        if not force_reload:
+            missing = mtus[[not is_cached(m) for m in mtus]]
+        else:
+            missing = mtus
+        span.set(mtus=len(mtus), cache_hits=len(mtus) - len(missing), cache_misses=len(missing))
+        if missing.empty:
+            logger.info("Load from DB")
+            return mtus
+
+        if request_session is None:
+            request_session = create_request_session()
+        data = {k: [] for k in ENDPOINTS}
+        window_start = missing[0]
+        while window_start <= missing[-1]:
+            window_end = min(window_start + window, missing[-1] + dt.timedelta(hours=1))
+            logger.info(f"Download {window_start.isoformat()} to {window_end.isoformat()}")
+            window_data = fetch_data(request_session, window_start, window_end, base_url=base_url)
+            for k, df in window_data.items():
+                data[k].append(df)
+            window_start = missing[missing >= window_end][0] if any(missing >= window_end) else window_end
+
+        data = {k: concat_domains(v) if k == "domain" else pd.concat(v) for k, v in data.items()}
+        missing_labels = [m.isoformat() for m in missing]
+        data = {k: df[df.reset_index()["mtu"].isin(missing_labels).values] for k, df in data.items()}
+        logger.info("Save to DB")
+        save_data(data)
+    return mtus
+
+def load_data_from_db(mtu, columns=None):
+    """Read all tables of *mtu* from the cache, projecting the domain table on *columns*.
+
+    Cache partitions are memory-mapped read-only, the tables are copied (only the selected 
+    columns) as ELI and plotting modify them in place. The IVA rows of the domain are added
+    by :func:`expand_iva`.
+    """
     index = {
         "domain": "index",
         "mcp": "mtu",
@@ -33,140 +151,372 @@ def load_data_from_db(mtu):
         "exchange": ["from", "to"],
     }
     data = {}
-    for k, i in index.items():
-        tmp_df = pd.read_feather(f"data/{k}.db")
-        tmp_df = tmp_df[tmp_df["mtu"] == mtu.isoformat()]
-        data[k] = tmp_df.set_index(i)
+    with metrics.span("load_data_from_db", mtu=mtu.isoformat()) as span:
+        for k, i in index.items():
+            if k == "domain":
+                domain = read_partition(k, mtu, columns=domain_read_columns(columns)).set_index(i)
+                domain = expand_iva(domain)
+                if columns is not None:
+                    domain = domain[["mtu"] + [c for c in columns if c not in ["index", "mtu"]]]
+                data[k] = domain.copy()
+            else:
+                data[k] = read_partition(k, mtu).set_index(i).copy()
+        data["domain"] = unique_domain_index(data["domain"])
+        span.set(rows=len(data["domain"]))
     return data
 
-def download_and_save_data(mtu, request_session):
-    def get_url(data):
-        return f"https://publicationtool.jao.eu/core/api/data/{data}"
+ENDPOINTS = {
+    "domain": "finalComputation",
+    "mcp": "netPos",
+    "lta": "lta",
+    "ltn": "ltn",
+    "exchange": "scheduledExchanges",
+}
+
+def get_url(data, base_url=None):
+    """URL of the endpoint *data* below *base_url*, by default JAO_BASE_URL or :data:`BASE_URL`"""
+    base_url = base_url or os.environ.get("JAO_BASE_URL", BASE_URL)
+    return f"{base_url.rstrip('/')}/{data}"
 
-    params = {
+def request_params(start, end):
+    """Query parameters of the JAO endpoints for the time range [start, end)"""
+    return {
         "Filter": json.dumps({"Presolved": True}),
-        "fromUtc": mtu.tz_convert("UTC").isoformat(),
-        "toUtc": (mtu + dt.timedelta(hours=1)).isoformat(),
+        "fromUtc": start.tz_convert("UTC").isoformat(),
+        "toUtc": end.tz_convert("UTC").isoformat(),
     }
-    data = {}
-    domain_response = request_session.get(
-        get_url("finalComputation"),
-        params=params,
-        verify=False,
-        proxies=request_session.proxies
-    )
 
-    data["domain"] = process_final_computation(domain_response, mtu)
-    mcp_response = request_session.get(
-        get_url("netPos"),
-        params=params,
-        verify=False,
-        proxies=request_session.proxies
-    )
-    data["mcp"] = process_mcp(mcp_response, mtu)
-    lta_response = request_session.get(
-        get_url("lta"),
-        params=params,
-        verify=False,
-        proxies=request_session.proxies
-    )
-    data["lta"] = process_lta(lta_response, mtu)
-    ltn_response = request_session.get(
-        get_url("ltn"),
-        params=params,
-        verify=False,
-        proxies=request_session.proxies
-    )
-    data["ltn"] = process_ltn(ltn_response, mtu)
-    
-    exchange_response = request_session.get(
-        get_url("scheduledExchanges"),
-        params=params,
-        verify=False,
-        proxies=request_session.proxies
+def fetch_data(request_session, start, end, mtu=None, base_url=None):
+    """Download and process all JAO endpoints for the time range [start, end) concurrently.
+
+    Each endpoint is requested and processed in its own thread, sharing the connection 
+    pool, headers and proxies of *request_session*. The wall-clock time is therefore 
+    close to the slowest single endpoint rather than the sum of all of them. If *mtu* 
+    is given, only data of this mtu is returned. Without *request_session* one is created 
+    by :func:`create_request_session`, so that cache-only runs never import requests. 
+    Failed requests raise an HTTPError. 
+    """
+    if request_session is None:
+        request_session = create_request_session()
+    params = request_params(start, end)
+    process = {
+        "domain": process_final_computation,
+        "mcp": process_mcp,
+        "lta": process_lta,
+        "ltn": process_ltn,
+        "exchange": process_exchange,
+    }
+    def fetch(k):
+        with metrics.span("fetch_endpoint", endpoint=ENDPOINTS[k]) as span:
+            # The domain payload is parsed while it is downloaded, see process_final_computation
+            stream = k == "domain"
+            response = request_session.get(
+                get_url(ENDPOINTS[k], base_url),
+                params=params,
+                verify=False,
+                proxies=request_session.proxies,
+                stream=stream
+            )
+            span.set(status_code=response.status_code)
+            response.raise_for_status()
+            if not stream:
+                span.set(bytes=len(response.content))
+            df = process[k](response, mtu)
+            span.set(rows=len(df))
+        return df
+
+    with metrics.span("fetch_data", start=start.isoformat(), end=end.isoformat()) as span:
+        with ThreadPoolExecutor(max_workers=len(ENDPOINTS)) as executor:
+            # Each thread runs in a copy of this context, its spans are children of fetch_data
+            futures = {k: executor.submit(contextvars.copy_context().run, fetch, k) for k in ENDPOINTS}
+            data = {k: f.result() for k, f in futures.items()}
+        span.set(rows=len(data["domain"]))
+    return data
+
+def save_data(data):
+    """Append processed data, possibly containing many mtus, to the mtu partitioned cache"""
+    with metrics.span("save_data", rows=len(data["domain"])):
+        write_partitions(data)
+
+def domain_read_columns(columns):
+    """Columns to read from a domain partition to return *columns* (all if None), see expand_iva"""
+    if columns is None:
+        return None
+    columns = ["index", "mtu"] + [c for c in columns if c not in ["index", "mtu"]]
+    return columns + [c for c in ["iva", "has_iva"] if c not in columns]
+
+def compact_domain(domain, zones=ZONES):
+    """Domain table with categorical string columns and float32 PTDFs.
+
+    The strings repeat on every row (mtu) or are shared by many CBCOs (cb, co and tso), as 
+    categoricals they are stored once. Published PTDFs have five decimals, which float32 
+    represents with an error below 1e-8.
+    """
+    return domain.astype({
+        **{c: "category" for c in CATEGORICAL_COLUMNS if c in domain.columns},
+        **{z: "float32" for z in zones if z in domain.columns},
+    })
+
+def concat_domains(domains):
+    """Concatenate compact domain tables, unifying the categories of categorical columns.
+
+    pd.concat falls back to object columns for categoricals with different categories. The 
+    categories are sorted as by pd.Categorical, independent of how the domain was split. Empty
+    tables are skipped, their categories may be of another dtype (e.g. object for no strings).
+    """
+    domains = [d for d in domains if len(d)] or domains[:1]
+    columns = {}
+    for c in domains[0].columns:
+        if isinstance(domains[0][c].dtype, pd.CategoricalDtype):
+            columns[c] = pd.api.types.union_categoricals([d[c] for d in domains], sort_categories=True)
+        else:
+            columns[c] = np.concatenate([d[c].values for d in domains])
+    index = pd.Index(np.concatenate([d.index.values for d in domains]), name=domains[0].index.name)
+    return pd.DataFrame(columns, index=index)
+
+def expand_iva(domain):
+    """Add the IVA variant (ram + iva) of each CBCO flagged in has_iva as own row.
+
+    The IVA rows are indexed after all rows of their mtu, keeping the index unique. The 
+    has_iva column is dropped, domains without it (caches of earlier versions) already 
+    contain the IVA rows and are returned unchanged.
+    """
+    if "has_iva" not in domain.columns:
+        return domain
+    has_iva = domain["has_iva"].values
+    domain = domain.drop(columns="has_iva")
+    iva_copy = domain[has_iva].copy()
+    iva_copy["ram"] += iva_copy["iva"]
+    label_offset = (
+        domain.index.to_series().groupby(domain["mtu"].values, observed=True).transform("max").values + 1
     )
-    data["exchange"] = process_exchange(exchange_response, mtu)
+    iva_copy.index = iva_copy.index + label_offset[has_iva]
+    return pd.concat([domain, iva_copy])
 
-    for k in data.keys():
-        try:
-            tmp_df = pd.read_feather(f"data/{k}.db")
-        except FileNotFoundError:
-            tmp_df = pd.DataFrame()
-        df = pd.concat([tmp_df, data[k].reset_index()])
-        df.to_feather(f"data/{k}.db")
+def unique_domain_index(domain):
+    """Relabel IVA rows of caches created before they were indexed after all rows of their mtu"""
+    if not domain.index.is_unique:
+        duplicated = domain.index.duplicated()
+        index = domain.index.values.copy()
+        index[duplicated] += index.max() + 1
+        domain.index = pd.Index(index, name=domain.index.name)
+    return domain
+
+def download_and_save_data(mtu, request_session):
+    data = fetch_data(request_session, mtu, mtu + dt.timedelta(hours=1), mtu=mtu)
+    save_data(data)
     return data
 
-def process_final_computation(domain_response, mtu):
-    """Process presolved FB Domain from JAO Publication Tool"""
-    data = pd.DataFrame.from_dict(domain_response.json()["data"])
-    zones_dict = {c: c.replace("ptdf_", "") for c in data.columns if "ptdf" in c}
-    zones = list(zones_dict.values())
-    data = data.rename(columns=zones_dict)
-    rename_dict = {
-        "dateTimeUtc": "mtu",
-        "cneName": "cb",
-        "contName": "co",
-        "tso": "tso",
-        "presolved": "presolved",
-        "iva": "iva",
-        "ram": "ram"
+def mtu_labels(date_time_utc):
+    """Convert the UTC timestamps of a JAO payload into the local mtu labels of the cache"""
+    labels = {
+        t: pd.Timestamp(t).tz_convert(TIMEZONE).isoformat() for t in date_time_utc.unique()
     }
-    data = data.rename(columns=rename_dict)
-    cols = list(rename_dict.values()) + zones
-    data["cb"] += data.direction.replace(np.nan, "")
-    data = data.loc[data[zones].notna().all(axis=1), cols]
-    data.loc[data.co.isna(), "co"] = "basecase"
-    data = data[~data.cb.str.contains("Constraint")]
-    data["mtu"] = mtu.isoformat()
-    iva_copy = data[data.iva > 0].copy()
-    iva_copy.loc[:, "ram"] += iva_copy.iva
-    data = pd.concat([data, iva_copy])
-    return data 
-
-def process_mcp(mcp_response, mtu):
+    return date_time_utc.map(labels)
+
+def iter_json_records(chunks, key="data"):
+    """Parse the array *key* of a JSON object read in byte *chunks*, yielding lists of records.
+
+    Only the records of the current chunk exist as Python objects, memory is bounded by the
+    chunk size instead of the size of the document. The array is located at the first 
+    occurrence of "key": [. The complete records of a chunk are parsed in one call, records
+    split by the chunk boundary are completed by the next chunk.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    array_start = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+    separator = re.compile(r"[\s,]*")
+    buffer, in_array = "", False
+    for chunk in chunks:
+        buffer += text_decoder.decode(chunk)
+        if not in_array:
+            match = array_start.search(buffer)
+            if match is None:
+                continue
+            buffer, in_array = buffer[match.end():], True
+        records, pos = [], 0
+        end = buffer.rfind("}")
+        try:
+            # Fails if the last brace does not close a record, e.g. at the end of the array
+            records, pos = json.loads("[" + buffer[separator.match(buffer).end():end + 1] + "]"), end + 1
+        except json.JSONDecodeError:
+            while True:
+                pos = separator.match(buffer, pos).end()
+                if not buffer.startswith("{", pos):
+                    break
+                try:
+                    record, pos = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    break
+                records.append(record)
+        buffer = buffer[separator.match(buffer, pos).end():]
+        yield records
+        if buffer.startswith("]"):
+            return
+    if not in_array:
+        raise KeyError(key)
+    raise ValueError("Incomplete JSON payload")
+
+def final_computation_frame(records, counts, mtu=None):
+    """Compact domain table of a part of the finalComputation records.
+
+    The fields are copied into typed columns without an intermediate DataFrame of Python 
+    objects, CBCOs with missing PTDFs and "Constraint" rows (and rows of other mtus than 
+    *mtu*) are dropped. CBCOs are labelled by their position within their mtu in the payload, 
+    *counts* holds the number of records of each mtu in the preceding parts and is updated.
+    """
+    ptdf_fields = [c for c in records[0] if "ptdf" in c] if records else [f"ptdf_{z}" for z in ZONES]
+    zones = [c.replace("ptdf_", "") for c in ptdf_fields]
+    def field(name):
+        return [r.get(name) for r in records]
+
+    date_time_utc = field("dateTimeUtc")
+    index = np.empty(len(records), dtype=int)
+    for i, t in enumerate(date_time_utc):
+        index[i] = counts.get(t, 0)
+        counts[t] = index[i] + 1
+    labels = {t: pd.Timestamp(t).tz_convert(TIMEZONE).isoformat() for t in set(date_time_utc)}
+    mtu_labels = np.array([labels[t] for t in date_time_utc], dtype=object)
+    cb = np.array([c + (d or "") for c, d in zip(field("cneName"), field("direction"))], dtype=object)
+    co = np.array(["basecase" if c is None else c for c in field("contName")], dtype=object)
+    ptdf = np.array([[r.get(f) for f in ptdf_fields] for r in records], dtype=np.float32)
+    ptdf = ptdf.reshape(len(records), len(ptdf_fields))
+
+    keep = ~np.isnan(ptdf).any(axis=1) & np.array(["Constraint" not in c for c in cb], dtype=bool)
+    if mtu is not None:
+        keep &= mtu_labels == mtu.isoformat()
+    return pd.DataFrame({
+        "mtu": pd.Categorical(mtu_labels[keep]),
+        "cb": pd.Categorical(cb[keep]),
+        "co": pd.Categorical(co[keep]),
+        "tso": pd.Categorical(np.array(field("tso"), dtype=object)[keep]),
+        "presolved": np.array(field("presolved"), dtype=bool)[keep],
+        "iva": np.array(field("iva"), dtype=float)[keep],
+        "ram": np.array(field("ram"), dtype=float)[keep],
+        **{z: ptdf[keep, j] for j, z in enumerate(zones)},
+    }, index=index[keep])
+
+def process_final_computation(domain_response, mtu=None):
+    """Process presolved FB Domain from JAO Publication Tool.
+
+    The payload is read in chunks of :data:`CHUNK_SIZE` and each chunk is converted into 
+    typed columns right away, so that peak memory stays close to the size of the result 
+    (see :func:`iter_json_records`). 
+
+    The domain is returned in the compact form of the cache (see :func:`compact_domain`), 
+    CBCOs with IVA are flagged in has_iva instead of adding their IVA variant as row, 
+    see :func:`expand_iva`. 
+    """
+    size, counts = 0, {}
+    def chunks():
+        nonlocal size
+        for chunk in domain_response.iter_content(CHUNK_SIZE):
+            size += len(chunk)
+            yield chunk
+    frames = [final_computation_frame(records, counts, mtu) for records in iter_json_records(chunks())]
+    data = concat_domains(frames or [final_computation_frame([], counts, mtu)])
+    data = data.assign(has_iva=(data.iva > 0).values)
+    metrics.annotate(bytes=size, rows=len(data) + int(data.has_iva.sum()), iva_rows=int(data.has_iva.sum()))
+    return data
+
+def process_mcp(mcp_response, mtu=None):
     """Process MCP from JAO Publication Tool"""
     data = pd.DataFrame.from_dict(mcp_response.json()["data"])
     zones_dict = {c: c.replace("hub_", "") for c in data.columns if "hub" in c}
     data = data.rename(columns=zones_dict)
-    data = data.loc[pd.to_datetime(data.dateTimeUtc) == mtu, ["dateTimeUtc"] +  list(zones_dict.values())]
+    data = data.loc[:, ["dateTimeUtc"] +  list(zones_dict.values())]
     data = data.rename(columns={"dateTimeUtc": "mtu"})
-    data["mtu"] = mtu.isoformat()
+    data["mtu"] = mtu_labels(data["mtu"])
+    if mtu is not None:
+        data = data[data["mtu"] == mtu.isoformat()]
     data = data.set_index(["mtu"], drop=True)
     return data
 
-def process_lta(lta_response, mtu):
+@functools.lru_cache(maxsize=None)
+def border_index(columns, zones=tuple(ZONES)):
+    """Positions of the border columns (border_X_Y) between *zones* and zone indices of X and Y.
+
+    The labels of an endpoint are the same in every payload, they are resolved once per
+    process and cached by the tuple of *columns*. Borders to other market areas are skipped.
+    """
+    zone_index = {z: i for i, z in enumerate(zones)}
+    borders = []
+    for position, column in enumerate(columns):
+        if column.startswith("border_"):
+            from_zone, _, to_zone = column[len("border_"):].partition("_")
+            if from_zone in zone_index and to_zone in zone_index:
+                borders.append((position, zone_index[from_zone], zone_index[to_zone]))
+    positions, border_from, border_to = np.array(borders, dtype=int).reshape(-1, 3).T
+    return positions, border_from, border_to
+
+def parse_border_table(response, zones=ZONES):
+    """Parse a border endpoint (lta, ltn or scheduledExchanges) into dense arrays.
+
+    Returns
+    -------
+    labels : np.ndarray
+        Local mtu label of each record.
+    values : np.ndarray
+        Values of shape (mtus, zones, zones), NaN where no border exists.
+    borders : tuple of np.ndarray
+        Zone indices (from, to) of the borders in the payload, in the order of its columns.
+    """
+    records = response.json()["data"]
+    columns = tuple(records[0]) if records else ()
+    positions, border_from, border_to = border_index(columns, tuple(zones))
+    names = [columns[p] for p in positions]
+    table = np.array([[r.get(c) for c in names] for r in records], dtype=float).reshape(len(records), len(names))
+    date_time_utc = [r["dateTimeUtc"] for r in records]
+    labels = {t: pd.Timestamp(t).tz_convert(TIMEZONE).isoformat() for t in set(date_time_utc)}
+    labels = np.array([labels[t] for t in date_time_utc], dtype=object)
+    values = np.full((len(records), len(zones), len(zones)), np.nan)
+    values[:, border_from, border_to] = table
+    return labels, values, (border_from, border_to)
+
+def process_border_table(response, name, mtu=None, zones=ZONES):
+    """Border table of the cache with the value column *name*, indexed by (from, to).
+
+    The rows are ordered by border and mtu. Only borders between *zones* are included.
+    """
+    labels, values, (border_from, border_to) = parse_border_table(response, zones)
+    if mtu is not None:
+        keep = labels == mtu.isoformat()
+        labels, values = labels[keep], values[keep]
+    index = pd.MultiIndex(
+        levels=[zones, zones], codes=[np.repeat(border_from, len(labels)), np.repeat(border_to, len(labels))],
+        names=["from", "to"]
+    )
+    return pd.DataFrame({
+        "mtu": np.tile(labels, len(border_from)),
+        name: values[:, border_from, border_to].T.ravel(),
+    }, index=index)
+
+def border_matrix(table, column, zones=ZONES):
+    """Dense zones x zones array of *column* of a border table of one mtu and the mask of its borders.
+
+    Borders to other market areas and the diagonal are ignored, missing borders are zero.
+    """
+    zone_index = pd.Index(zones)
+    border_from, border_to = (
+        zone_index.get_indexer(table.index.levels[i])[table.index.codes[i]] for i in range(2)
+    )
+    cond = (border_from >= 0) & (border_to >= 0) & (border_from != border_to)
+    values, mask = np.zeros((len(zones), len(zones))), np.zeros((len(zones), len(zones)))
+    values[border_from[cond], border_to[cond]] = table[column].values[cond]
+    mask[border_from[cond], border_to[cond]] = 1
+    return values, mask
+
+def process_lta(lta_response, mtu=None):
     """Process LTA from JAO Publication Tool"""
-    data = pd.DataFrame.from_dict(lta_response.json()["data"]).drop("id", axis=1)
-    zones_dict = {c: c.replace("border_", "") for c in data.columns if "border" in c}
-    data = data.rename(columns=zones_dict).melt(id_vars="dateTimeUtc")
-    data[["from", "to"]] = data.variable.str.split("_", n=1, expand=True)
-    data = data[(pd.to_datetime(data.dateTimeUtc) == mtu)].drop(["variable"], axis=1)
-    data = data.rename(columns={"value": "lta", "dateTimeUtc": "mtu"}).set_index(["from", "to"], drop=True)
-    data["mtu"] = mtu.isoformat()
-    return data
+    return process_border_table(lta_response, "lta", mtu)
 
-def process_ltn(ltn_response, mtu):
+def process_ltn(ltn_response, mtu=None):
     """Process LTN from JAO Publication Tool"""
-    data = pd.DataFrame.from_dict(ltn_response.json()["data"]).drop("id", axis=1)
-    zones_dict = {c: c.replace("border_", "") for c in data.columns if "border" in c}
-    data = data.rename(columns=zones_dict).melt(id_vars="dateTimeUtc")
-    data[["from", "to"]] = data.variable.str.split("_", n=1, expand=True)
-    data = data[(pd.to_datetime(data.dateTimeUtc) == mtu)].drop(["variable"], axis=1)
-    data = data.rename(columns={"value": "ltn", "dateTimeUtc": "mtu"}).set_index(["from", "to"], drop=True)
-    data["mtu"] = mtu.isoformat()
-    return data
+    return process_border_table(ltn_response, "ltn", mtu)
 
-def process_exchange(exchange_response, mtu):
+def process_exchange(exchange_response, mtu=None):
     """Process Exchange from JAO Publication Tool"""
-    data = pd.DataFrame.from_dict(exchange_response.json()["data"]).drop("id", axis=1)
-    zones_dict = {c: c.replace("border_", "") for c in data.columns if "border" in c}
-    data = data.rename(columns=zones_dict).melt(id_vars="dateTimeUtc")
-    data[["from", "to"]] = data.variable.str.split("_", n=1, expand=True)
-    data = data[data["from"].isin(ZONES)&(data["to"].isin(ZONES))]
-    data = data[pd.to_datetime(data.dateTimeUtc) == mtu].drop(["variable"], axis=1)
-    data = data.rename(columns={"value": "exchange", "dateTimeUtc": "mtu"}).set_index(["from", "to"], drop=True)
-    data["mtu"] = mtu.isoformat()
-    return data
+    return process_border_table(exchange_response, "exchange", mtu)
 
 def add_alegro_exchange(exchange, mcp, mtu):
     """Modify Exchange to explicitly include Alegro Exchange"""
@@ -193,4 +543,11 @@ def add_alegro_exchange(exchange, mcp, mtu):
     exchange = pd.concat([exchange, albe_exchange])
     return exchange
 
-
+def prepare_exchange(exchange, mcp, mtu):
+    """Scheduled exchange including Alegro, limited to borders between ZONES"""
+    exchange = add_alegro_exchange(exchange, mcp, mtu)
+    cond = (
+        exchange.index.get_level_values("from").isin(ZONES)
+        &exchange.index.get_level_values("to").isin(ZONES)
+    )
+    return exchange[cond]
@@ -1,10 +1,16 @@
-import cvxpy as cp
+import logging
 import numpy as np 
 import pandas as pd 
 import time
 
+from domain_viewer import metrics
+from domain_viewer.data_processing import border_matrix
+
+logger = logging.getLogger(__name__)
+
 def create_ELI_constraints(domain, lta, zones):
-    
+    import cvxpy as cp
+
     ram_threshold = 1
     domain.loc[domain.ram < ram_threshold, "ram"] = ram_threshold
     ptdf = domain.loc[:, zones].values
@@ -53,11 +59,12 @@ def create_ELI_constraints(domain, lta, zones):
             - (SlackFlowNeg[z, zz] - SlackFlowNeg[zz, z]) for zz in range(Z)]))
         constraints.append(NetPosLTA[z] == sum([FlowLTA[z, zz] - FlowLTA[zz, z] for zz in range(Z)]))
 
+    lta_values, has_lta = border_matrix(lta, "lta", zones)
     for z in range(Z):
         for zz in range(Z):
             if not z==zz:
-                if (zones[z], zones[zz]) in lta.index:
-                    constraints.append(FlowLTA[z,zz] <= (1-Alpha) * lta.loc[(zones[z], zones[zz]), "lta"])  
+                if has_lta[z, zz]:
+                    constraints.append(FlowLTA[z,zz] <= (1-Alpha) * lta_values[z, zz])  
                 else:
                     constraints.append(FlowLTA[z,zz] <= 0)   
 
@@ -65,22 +72,38 @@ def create_ELI_constraints(domain, lta, zones):
     prob = cp.Problem(objective, constraints)
     return prob
 
-def calculate_FB_exchange(domain, lta, zones, mcp, exchange):
+@metrics.span("calculate_FB_exchange")
+def calculate_FB_exchange(domain, lta, zones, mcp, exchange, model=None, backend="cvxpy"):
+    """Calculate the FB and LTA components of the market clearing point (ELI).
+
+    If a compiled :class:`ELIModel` is passed as *model*, its parameters are updated and 
+    the model is re-solved, otherwise the problem is built from scratch. With 
+    *backend="highs"* the LP is assembled as sparse matrices and solved with HiGHS directly, 
+    see :func:`build_ELI_lp`. 
+    """
+    metrics.annotate(cbcos=len(domain))
+    if model is not None:
+        return model.solve(domain, lta, mcp, exchange)
+    if backend == "highs":
+        return solve_ELI_lp(domain, lta, zones, mcp, exchange)
+    elif backend != "cvxpy":
+        raise AttributeError(f"Unknown ELI backend {backend}, use cvxpy or highs")
+    import cvxpy as cp
     prob = create_ELI_constraints(domain, lta, zones)
     constr = prob.constraints 
+    exchange_values, has_exchange = border_matrix(exchange, "exchange", zones)
     for z in range(len(zones)):
         constr.append(prob.var_dict["NetPos"][z] == mcp[zones[z]])
         for zz in range(len(zones)):
             if not z==zz:
-                if (zones[z], zones[zz]) in exchange.index:
+                if has_exchange[z, zz]:
                     constr.append(
-                        prob.var_dict["Flow"][z,zz] >= exchange.loc[(zones[z], zones[zz]), "exchange"] + prob.var_dict["SlackFlowPos"][z,zz] - prob.var_dict["SlackFlowNeg"][z,zz] )          
-                    constr.append(prob.var_dict["SlackFlowNeg"][z,zz] <= exchange.loc[(zones[z], zones[zz]), "exchange"])          
+                        prob.var_dict["Flow"][z,zz] >= exchange_values[z, zz] + prob.var_dict["SlackFlowPos"][z,zz] - prob.var_dict["SlackFlowNeg"][z,zz] )          
+                    constr.append(prob.var_dict["SlackFlowNeg"][z,zz] <= exchange_values[z, zz])          
                 
                 else:
                     constr.append(prob.var_dict["Flow"][z,zz] <= 0)
         
-    start_time  = time.time()
     obj = -sum(
         sum(prob.var_dict["Slack"]*1000) 
         + sum(prob.var_dict["SlackFlowPos"] 
@@ -95,28 +118,490 @@ def calculate_FB_exchange(domain, lta, zones, mcp, exchange):
         },
         verbose=False
     )
-    cond = (prob.var_dict["Slack"].value > 1e-2)
+    metrics.annotate(backend="cvxpy", solver_status=prob.status, iterations=prob.solver_stats.num_iters)
+    values = {k: v.value for k, v in prob.var_dict.items()}
+    return collect_ELI_results(values, domain, lta, zones, mcp, exchange)
+
+class ELIModel():
+    """Compiled, parameterised ELI model to be re-solved for consecutive mtus.
+
+    The ELI problem of :func:`calculate_FB_exchange` is built once with the RAMs, PTDF matrix, 
+    LTAs, MCP net positions and scheduled exchanges as DPP-compliant cvxpy parameters. Solving 
+    another mtu only updates the parameter values, the canonicalisation is cached by cvxpy. 
+    Borders without LTA or exchange are represented by zero values and masks. 
+
+    The number of CBCOs varies between mtus, therefore the model is built for a *capacity* 
+    of CBCOs and unused rows are filled with zero PTDFs. The model is rebuilt with a larger 
+    capacity if a domain exceeds it. 
+
+    Parameters
+    ----------
+    zones : list
+        Zones of the ELI model, i.e. the zonal PTDF columns. 
+    capacity : int, optional
+        Initial number of CBCOs the model can hold. 
+    """
+    def __init__(self, zones, capacity=0):
+        self.zones = zones
+        self.capacity = 0
+        self.prob = None
+        if capacity > 0:
+            self.build(capacity)
+
+    def build(self, capacity):
+        """Build the parameterised problem for up to *capacity* CBCOs"""
+        import cvxpy as cp
+        zones = self.zones
+        Z = len(zones)
+        AL_IDX = [zones.index(z) for z in zones if "AL" in z]
+        offdiag = 1 - np.eye(Z)
+
+        self.params = {
+            "ptdf": cp.Parameter((capacity, Z), name="ptdf"),
+            "ram": cp.Parameter(capacity, name="ram"),
+            "lta": cp.Parameter((Z, Z), name="lta"),
+            "mcp": cp.Parameter(Z, name="mcp"),
+            "exchange": cp.Parameter((Z, Z), name="exchange"),
+            "has_exchange": cp.Parameter((Z, Z), name="has_exchange"),
+            "no_exchange": cp.Parameter((Z, Z), name="no_exchange"),
+        }
+        p = self.params
+
+        NetPos = cp.Variable(Z, name="NetPos")
+        NetPosFB = cp.Variable(Z, name="NetPosFB")
+        NetPosLTA = cp.Variable(Z, name="NetPosLTA")
+        Flow = cp.Variable((Z,Z), name="Flow")
+        FlowFB = cp.Variable((Z,Z), name="FlowFB")
+        FlowLTA = cp.Variable((Z,Z), "FlowLTA")
+        Alpha = cp.Variable(name="Alpha")
+        Slack = cp.Variable(capacity, name="Slack")
+        SlackNP = cp.Variable(Z, name="SlackNP")
+        SlackFlowPos = cp.Variable((Z,Z), name="SlackFlowPos")
+        SlackFlowNeg = cp.Variable((Z,Z), name="SlackFlowNeg")
+
+        constraints = [
+            FlowFB >= 0,
+            FlowLTA >= 0,
+            cp.sum(NetPosLTA[AL_IDX]) == 0,
+            cp.sum(NetPos[AL_IDX]) == 0,
+            Alpha >= 0,
+            Alpha <= 1,
+            Slack >= 0,
+            Slack <= 100, 
+            SlackNP >= -10, 
+            SlackNP <= 10, 
+            SlackFlowPos >= 0, 
+            SlackFlowNeg >= 0, 
+            SlackFlowPos <= 1e-2, 
+            SlackFlowNeg <= 1e-2, 
+            NetPos == NetPosFB + NetPosLTA + SlackNP,
+            Flow == FlowFB + FlowLTA,
+            p["ptdf"] @ NetPosFB <= Alpha * p["ram"] + Slack,
+            cp.sum(NetPos) == 0,
+            cp.sum(NetPosFB) == 0,
+            cp.sum(NetPosLTA) == 0,
+            NetPosFB == (
+                cp.sum(FlowFB, axis=1) - cp.sum(FlowFB, axis=0)
+                + cp.sum(SlackFlowPos, axis=1) - cp.sum(SlackFlowPos, axis=0)
+                - cp.sum(SlackFlowNeg, axis=1) + cp.sum(SlackFlowNeg, axis=0)
+            ),
+            NetPosLTA == cp.sum(FlowLTA, axis=1) - cp.sum(FlowLTA, axis=0),
+            cp.multiply(offdiag, FlowLTA - p["lta"] * (1 - Alpha)) <= 0,
+            NetPos == p["mcp"],
+            cp.multiply(p["has_exchange"], Flow - SlackFlowPos + SlackFlowNeg) >= p["exchange"],
+            cp.multiply(p["has_exchange"], SlackFlowNeg) <= p["exchange"],
+            cp.multiply(p["no_exchange"], Flow) <= 0,
+        ]
+        # Same weights as in calculate_FB_exchange, where the slack sum is added once per zone. 
+        obj = -(Z*1000*cp.sum(Slack) + cp.sum(SlackFlowPos + SlackFlowNeg)) + Alpha*1e3
+        self.prob = cp.Problem(cp.Maximize(obj), constraints)
+        self.capacity = capacity
+
+    def solve(self, domain, lta, mcp, exchange):
+        """Update the parameters with the data of one mtu and solve.
+
+        Returns the same results as :func:`calculate_FB_exchange`. 
+        """
+        import cvxpy as cp
+        ram_threshold = 1
+        domain.loc[domain.ram < ram_threshold, "ram"] = ram_threshold
+        n = len(domain)
+        if n > self.capacity:
+            self.build(max(n, 2*self.capacity))
+
+        Z = len(self.zones)
+        ptdf = np.zeros((self.capacity, Z))
+        ptdf[:n] = domain.loc[:, self.zones].values
+        ram = np.full(self.capacity, float(ram_threshold))
+        ram[:n] = domain.loc[:, "ram"].values
+        lta_values, _ = border_matrix(lta, "lta", self.zones)
+        exchange_values, has_exchange = border_matrix(exchange, "exchange", self.zones)
+
+        p = self.params
+        p["ptdf"].value = ptdf
+        p["ram"].value = ram
+        p["lta"].value = lta_values
+        p["mcp"].value = np.array([mcp[z] for z in self.zones], dtype=float)
+        p["exchange"].value = exchange_values
+        p["has_exchange"].value = has_exchange
+        p["no_exchange"].value = (1 - np.eye(Z)) * (1 - has_exchange)
+
+        self.prob.solve(
+            solver=cp.SCIPY, 
+            scipy_options={
+                "method": "highs-ds",
+                "presolve": True
+            },
+            verbose=False
+        )
+        metrics.annotate(
+            backend="cvxpy-compiled", solver_status=self.prob.status, 
+            iterations=self.prob.solver_stats.num_iters
+        )
+        values = {k: v.value for k, v in self.prob.var_dict.items()}
+        values["Slack"] = values["Slack"][:n]
+        return collect_ELI_results(values, domain, lta, self.zones, mcp, exchange)
+
+def build_ELI_lp(domain, lta, zones, mcp, exchange, slots=None, capacity=None):
+    """Assemble the ELI problem as LP in scipy.sparse form.
+
+    The formulation equals the one of :func:`calculate_FB_exchange`. All variables are 
+    stacked into one vector, the constraint matrices are built as CSR matrices from 
+    vectorised index arithmetic, fixed values and simple bounds are expressed as variable 
+    bounds. LTA and exchange constraints have one row per (off-diagonal) border, where 
+    missing borders have zero values. 
+
+    Optionally, the CBCOs of the domain are placed into the rows *slots* of a problem with 
+    *capacity* CBCO rows, unused rows have zero PTDFs. The dimensions of the LP then only 
+    depend on *capacity* and the zones, which allows to re-use a basis between mtus. 
+
+    Returns
+    -------
+    lp : dict
+        c, A_ub, b_ub, A_eq, b_eq and bounds as used by scipy.optimize.linprog.
+    layout : dict 
+        Variable name to (slice, shape) of the variable vector. 
+    """
+    import scipy.sparse as sp
+    ram_threshold = 1
+    domain.loc[domain.ram < ram_threshold, "ram"] = ram_threshold
+    Z = len(zones)
+    if slots is None:
+        slots = np.arange(len(domain))
+    n = capacity if capacity is not None else len(domain)
+    ptdf = np.zeros((n, Z))
+    ptdf[slots] = domain.loc[:, zones].values
+    ram = np.full(n, float(ram_threshold))
+    ram[slots] = domain.loc[:, "ram"].values
+    AL_IDX = [zones.index(z) for z in zones if "AL" in z]
+
+    shapes = {
+        "NetPos": (Z,), "NetPosFB": (Z,), "NetPosLTA": (Z,),
+        "Flow": (Z, Z), "FlowFB": (Z, Z), "FlowLTA": (Z, Z),
+        "Alpha": (), "Slack": (n,), "SlackNP": (Z,),
+        "SlackFlowPos": (Z, Z), "SlackFlowNeg": (Z, Z),
+    }
+    layout, start = {}, 0
+    for name, shape in shapes.items():
+        size = int(np.prod(shape))
+        layout[name] = (slice(start, start + size), shape)
+        start += size
+    num_vars = start
+    idx = {name: np.arange(num_vars)[s].reshape(shape) for name, (s, shape) in layout.items()}
+    zz = np.arange(Z)
+    
+    # Bounds
+    lb, ub = np.full(num_vars, -np.inf), np.full(num_vars, np.inf)
+    lb[idx["NetPos"]] = ub[idx["NetPos"]] = [mcp[z] for z in zones]
+    lb[idx["FlowFB"].ravel()] = 0
+    lb[idx["FlowLTA"].ravel()] = 0
+    lb[idx["Alpha"]], ub[idx["Alpha"]] = 0, 1
+    lb[idx["Slack"]], ub[idx["Slack"]] = 0, 100
+    lb[idx["SlackNP"]], ub[idx["SlackNP"]] = -10, 10
+    for name in ["SlackFlowPos", "SlackFlowNeg"]:
+        lb[idx[name].ravel()], ub[idx[name].ravel()] = 0, 1e-2
+
+    lta_matrix, _ = border_matrix(lta, "lta", zones)
+    exchange_matrix, has_exchange = border_matrix(exchange, "exchange", zones)
+    border_from, border_to = np.nonzero(~np.eye(Z, dtype=bool))
+    no_exchange = ~np.eye(Z, dtype=bool) & (has_exchange == 0)
+    ub[idx["Flow"][no_exchange]] = 0
+    ub[idx["SlackFlowNeg"][has_exchange == 1]] = np.minimum(1e-2, exchange_matrix[has_exchange == 1])
+
+    # Equality constraints, collected as (rows, cols, values) triplets
+    eq_rows, eq_cols, eq_vals = [], [], []
+    row = 0
+    def add_eq(rows, cols, vals):
+        eq_rows.append(np.broadcast_to(rows, np.shape(cols)).ravel())
+        eq_cols.append(np.asarray(cols).ravel())
+        eq_vals.append(np.broadcast_to(vals, np.shape(cols)).ravel())
+        
+    # sum(NetPosLTA[AL_IDX]) == 0, sum(NetPos[AL_IDX]) == 0
+    add_eq(row, idx["NetPosLTA"][AL_IDX], 1.)
+    add_eq(row + 1, idx["NetPos"][AL_IDX], 1.)
+    row += 2
+    # NetPos == NetPosFB + NetPosLTA + SlackNP
+    for name, sign in [("NetPos", 1.), ("NetPosFB", -1.), ("NetPosLTA", -1.), ("SlackNP", -1.)]:
+        add_eq(row + zz, idx[name], sign)
+    row += Z
+    # Flow == FlowFB + FlowLTA
+    for name, sign in [("Flow", 1.), ("FlowFB", -1.), ("FlowLTA", -1.)]:
+        add_eq(row + np.arange(Z*Z), idx[name].ravel(), sign)
+    row += Z*Z
+    # sum(NetPos) == sum(NetPosFB) == sum(NetPosLTA) == 0 
+    for name in ["NetPos", "NetPosFB", "NetPosLTA"]:
+        add_eq(row, idx[name], 1.)
+        row += 1
+    # Flow balance of NetPosFB and NetPosLTA, outgoing minus incoming flows
+    outgoing, incoming = np.repeat(zz, Z), np.tile(zz, Z)
+    for name, flows in [("NetPosFB", [("FlowFB", 1.), ("SlackFlowPos", 1.), ("SlackFlowNeg", -1.)]), 
+                        ("NetPosLTA", [("FlowLTA", 1.)])]:
+        add_eq(row + zz, idx[name], 1.)
+        for flow, sign in flows:
+            add_eq(row + outgoing, idx[flow].ravel(), -sign)
+            add_eq(row + incoming, idx[flow].ravel(), sign)
+        row += Z
+    A_eq = sp.csr_matrix(
+        (np.concatenate(eq_vals), (np.concatenate(eq_rows), np.concatenate(eq_cols))), 
+        shape=(row, num_vars)
+    )
+    b_eq = np.zeros(row)
+
+    # Inequality constraints
+    # ptdf@NetPosFB - Alpha*ram - Slack <= 0
+    ptdf_block = sp.csr_matrix(ptdf)
+    ptdf_block.eliminate_zeros()
+    ptdf_rows = sp.csr_matrix(
+        (ptdf_block.data, ptdf_block.indices + idx["NetPosFB"][0], ptdf_block.indptr), 
+        shape=(n, num_vars)
+    )
+    alpha_slack_rows = sp.csr_matrix(
+        (np.concatenate([-ram, -np.ones(n)]), 
+         (np.tile(np.arange(n), 2), np.concatenate([np.full(n, idx["Alpha"]), idx["Slack"]]))),
+        shape=(n, num_vars)
+    )
+    # FlowLTA <= (1 - Alpha)*lta
+    m = len(border_from)
+    lta_border = lta_matrix[border_from, border_to]
+    lta_rows = sp.csr_matrix(
+        (np.concatenate([np.ones(m), lta_border]), 
+         (np.tile(np.arange(m), 2), np.concatenate([idx["FlowLTA"][border_from, border_to], np.full(m, idx["Alpha"])]))),
+        shape=(m, num_vars)
+    )
+    # Flow >= exchange + SlackFlowPos - SlackFlowNeg, for borders with exchange
+    has_border = has_exchange[border_from, border_to]
+    exchange_rows = sp.csr_matrix(
+        (np.concatenate([-has_border, has_border, -has_border]), 
+         (np.tile(np.arange(m), 3), np.concatenate([
+             idx["Flow"][border_from, border_to], 
+             idx["SlackFlowPos"][border_from, border_to], 
+             idx["SlackFlowNeg"][border_from, border_to]
+         ]))),
+        shape=(m, num_vars)
+    )
+    A_ub = sp.vstack([ptdf_rows + alpha_slack_rows, lta_rows, exchange_rows], format="csr")
+    A_ub.eliminate_zeros()
+    b_ub = np.concatenate([np.zeros(n), lta_border, -exchange_matrix[border_from, border_to]])
+
+    # Objective, same weights as in calculate_FB_exchange, where the slack sum is added once per zone. 
+    c = np.zeros(num_vars)
+    c[idx["Slack"]] = Z*1000
+    c[idx["SlackFlowPos"].ravel()] = 1
+    c[idx["SlackFlowNeg"].ravel()] = 1
+    c[idx["Alpha"]] = -1e3
+
+    lp = {
+        "c": c, "A_ub": A_ub, "b_ub": b_ub, "A_eq": A_eq, "b_eq": b_eq, 
+        "bounds": np.vstack([lb, ub]).T
+    }
+    return lp, layout
+
+def solve_ELI_lp(domain, lta, zones, mcp, exchange):
+    """Solve the ELI problem with HiGHS via scipy.optimize.linprog, bypassing cvxpy"""
+    from scipy.optimize import linprog
+    lp, layout = build_ELI_lp(domain, lta, zones, mcp, exchange)
+    res = linprog(**lp, method="highs-ds", options={"presolve": True})
+    metrics.annotate(backend="highs", solver_status=res.message, iterations=res.nit)
+    if res.status != 0:
+        raise RuntimeError(f"ELI problem could not be solved: {res.message}")
+    values = {name: res.x[s].reshape(shape) for name, (s, shape) in layout.items()}
+    return collect_ELI_results(values, domain, lta, zones, mcp, exchange)
+
+class ELISequence():
+    """Solve the ELI problem for a sequence of mtus, warm-starting HiGHS from the previous basis.
+
+    Neighbouring mtus have nearly identical domains, LTAs and net positions, therefore the 
+    optimal basis of one mtu is a good starting point for dual simplex in the next. Each CBCO 
+    keeps its row (slot) of the LP built by :func:`build_ELI_lp` while it is part of the 
+    domains, slots of CBCOs that are no longer present are re-used by new ones. As the LP 
+    dimensions only change when the capacity grows, the previous basis remains a valid 
+    starting basis. 
+
+    Iterations and solve time per mtu are recorded in :attr:`statistics`. With *compare_cold* 
+    each mtu is additionally solved from scratch to report the iterations and time saved by 
+    the warm start. 
+
+    Parameters
+    ----------
+    zones : list
+        Zones of the ELI model, i.e. the zonal PTDF columns. 
+    compare_cold : bool, optional
+        Additionally solve each mtu without warm start, by default False.
+    """
+    def __init__(self, zones, compare_cold=False):
+        import highspy
+        self.zones = zones
+        self.compare_cold = compare_cold
+        self.highs = highspy.Highs()
+        self.highs.setOptionValue("output_flag", False)
+        self.highs.setOptionValue("solver", "simplex")
+        self.highs.setOptionValue("simplex_strategy", 1) # dual simplex
+        self.slots = {}
+        self.capacity = 0
+        self.layout = None
+        self.basis = None
+        self.statistics = []
+
+    def assign_slots(self, domain):
+        """Assign each CBCO of *domain* to a row slot, keeping the slots of known CBCOs"""
+        if {"cb", "co"}.issubset(domain.columns):
+            keys = [domain.cb.values, domain.co.values, domain.groupby(["cb", "co"], observed=True).cumcount().values]
+        else:
+            keys = [domain.index.values, domain.groupby(level=0).cumcount().values]
+        keys = list(zip(*keys))
+        slots = {k: self.slots[k] for k in keys if k in self.slots}
+        new_keys = [k for k in keys if k not in slots]
+        free = sorted(set(range(self.capacity)) - set(slots.values()))
+        if len(new_keys) > len(free):
+            capacity = max(len(keys), 2*self.capacity)
+            free += list(range(self.capacity, capacity))
+            self.capacity = capacity
+        slots.update(zip(new_keys, free))
+        self.slots = slots
+        return np.array([slots[k] for k in keys], dtype=int)
+
+    def extend_basis(self, layout):
+        """Extend the previous basis to a larger capacity, new CBCO rows are basic"""
+        import highspy
+        old_slack, _ = self.layout["Slack"]
+        new_slack, _ = layout["Slack"]
+        num_new = (new_slack.stop - new_slack.start) - (old_slack.stop - old_slack.start)
+        col_status = list(self.basis.col_status)
+        self.basis.col_status = (
+            col_status[:old_slack.stop] + [highspy.HighsBasisStatus.kLower]*num_new 
+            + col_status[old_slack.stop:]
+        )
+        row_status = list(self.basis.row_status)
+        ptdf_end = self.num_eq_rows + (old_slack.stop - old_slack.start)
+        self.basis.row_status = (
+            row_status[:ptdf_end] + [highspy.HighsBasisStatus.kBasic]*num_new 
+            + row_status[ptdf_end:]
+        )
+
+    def run(self, warm_start=False):
+        """Run HiGHS, without presolve for warm starts as presolve would discard the basis"""
+        import highspy
+        self.highs.setOptionValue("presolve", "off" if warm_start else "choose")
+        start_time = time.perf_counter()
+        self.highs.run()
+        run_time = time.perf_counter() - start_time
+        if self.highs.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+            raise RuntimeError(
+                f"ELI problem could not be solved: {self.highs.modelStatusToString(self.highs.getModelStatus())}"
+            )
+        return self.highs.getInfo().simplex_iteration_count, run_time
+
+    @metrics.span("calculate_FB_exchange")
+    def solve(self, domain, lta, mcp, exchange, mtu=None):
+        """Solve the ELI problem of one mtu, warm-started from the previous one.
+
+        Returns the same results as :func:`calculate_FB_exchange`. 
+        """
+        import highspy
+        import scipy.sparse as sp
+        slots = self.assign_slots(domain)
+        lp, layout = build_ELI_lp(domain, lta, self.zones, mcp, exchange, slots=slots, capacity=self.capacity)
+        A = sp.vstack([lp["A_eq"], lp["A_ub"]], format="csr")
+        highs_lp = highspy.HighsLp()
+        highs_lp.num_col_, highs_lp.num_row_ = A.shape[1], A.shape[0]
+        highs_lp.col_cost_ = lp["c"]
+        highs_lp.col_lower_, highs_lp.col_upper_ = lp["bounds"][:, 0], lp["bounds"][:, 1]
+        highs_lp.row_lower_ = np.concatenate([lp["b_eq"], np.full(len(lp["b_ub"]), -highspy.kHighsInf)])
+        highs_lp.row_upper_ = np.concatenate([lp["b_eq"], lp["b_ub"]])
+        highs_lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+        highs_lp.a_matrix_.num_col_, highs_lp.a_matrix_.num_row_ = A.shape[1], A.shape[0]
+        highs_lp.a_matrix_.start_ = A.indptr
+        highs_lp.a_matrix_.index_ = A.indices
+        highs_lp.a_matrix_.value_ = A.data
+        self.highs.passModel(highs_lp)
+        
+        statistics = {"mtu": mtu, "cbcos": len(domain), "warm_start": self.basis is not None}
+        if self.compare_cold:
+            statistics["cold_iterations"], statistics["cold_time"] = self.run()
+            self.highs.clearSolver()
+        if self.basis is not None:
+            if layout["Slack"][0] != self.layout["Slack"][0]:
+                self.extend_basis(layout)
+            self.highs.setBasis(self.basis)
+        statistics["iterations"], statistics["time"] = self.run(warm_start=self.basis is not None)
+        if self.compare_cold:
+            statistics["saved_iterations"] = statistics["cold_iterations"] - statistics["iterations"]
+            statistics["saved_time"] = statistics["cold_time"] - statistics["time"]
+        self.statistics.append(statistics)
+        metrics.annotate(
+            backend="highs-warm", cbcos=len(domain), warm_start=statistics["warm_start"], 
+            solver_status=self.highs.modelStatusToString(self.highs.getModelStatus()), 
+            iterations=statistics["iterations"]
+        )
+        self.basis = self.highs.getBasis()
+        self.layout, self.num_eq_rows = layout, lp["A_eq"].shape[0]
+
+        x = np.array(self.highs.getSolution().col_value)
+        values = {name: x[s].reshape(shape) for name, (s, shape) in layout.items()}
+        values["Slack"] = values["Slack"][slots]
+        return collect_ELI_results(values, domain, lta, self.zones, mcp, exchange)
+
+def collect_ELI_results(values, domain, lta, zones, mcp, exchange):
+    """Collect flow and net position components from the solved ELI variable values"""
+    cond = (values["Slack"] > 1e-2)
     domain_copy = domain.loc[cond].copy()
-    domain_copy.loc[:, "ram"] += prob.var_dict["Slack"].value[cond]
+    domain_copy.loc[:, "ram"] += values["Slack"][cond]
  
     df = exchange.copy()
-    df["Flow"] = [prob.var_dict["Flow"].value[zones.index(i), zones.index(j)] for i,j in exchange.index]
-    df["FlowFB"] = [prob.var_dict["FlowFB"].value[zones.index(i), zones.index(j)] for i,j in exchange.index]
-    df["FlowLTA"] = [prob.var_dict["FlowLTA"].value[zones.index(i), zones.index(j)] for i,j in exchange.index]
-    df["SlackFlowNeg"] = [prob.var_dict["SlackFlowNeg"].value[zones.index(i), zones.index(j)] for i,j in exchange.index]
-    df["SlackFlowPos"] = [prob.var_dict["SlackFlowPos"].value[zones.index(i), zones.index(j)] for i,j in exchange.index]
-    df["LTA"] = [lta.loc[(i,j), "lta"] for i,j in exchange.index if (i,j) in lta.index] + [0, 0]  
+    zone_index = pd.Index(zones)
+    border_from = zone_index.get_indexer(exchange.index.get_level_values("from"))
+    border_to = zone_index.get_indexer(exchange.index.get_level_values("to"))
+    for col in ["Flow", "FlowFB", "FlowLTA", "SlackFlowNeg", "SlackFlowPos"]:
+        df[col] = values[col][border_from, border_to]
+    # Borders without LTA (Alegro) are zero
+    df["LTA"] = border_matrix(lta, "lta", zones)[0][border_from, border_to]
     
     df_np = pd.DataFrame(index=zones)
     df_np["MCP"] = [mcp[z]for z in zones]
-    df_np["NetPosFB"] = [prob.var_dict["NetPosFB"].value[zones.index(z)] for z in zones]
-    df_np["NetPosLTA"] = [prob.var_dict["NetPosLTA"].value[zones.index(z)] for z in zones]
-    df_np["NetPos"] = [prob.var_dict["NetPos"].value[zones.index(z)] for z in zones]
-    df_np["SlackNP"] = [prob.var_dict["SlackNP"].value[zones.index(z)] for z in zones]
-    end_time = time.time()
-    print("Sum Slack", sum(prob.var_dict["Slack"].value), sum(prob.var_dict["SlackNP"].value))
-    print("Alpha", prob.var_dict["Alpha"].value)
+    df_np["NetPosFB"] = [values["NetPosFB"][zones.index(z)] for z in zones]
+    df_np["NetPosLTA"] = [values["NetPosLTA"][zones.index(z)] for z in zones]
+    df_np["NetPos"] = [values["NetPos"][zones.index(z)] for z in zones]
+    df_np["SlackNP"] = [values["SlackNP"][zones.index(z)] for z in zones]
+    logger.info(f"Sum Slack {sum(values['Slack'])} {sum(values['SlackNP'])}")
+    logger.info(f"Alpha {values['Alpha']}")
+    metrics.annotate(
+        slack=float(sum(values["Slack"])), slack_np=float(sum(values["SlackNP"])), 
+        ram_corrections=int(cond.sum()), alpha=float(values["Alpha"])
+    )
     
     # tmp = {z: sum(df.loc[pd.IndexSlice[z,:],"FlowFB"]) - sum(df.loc[pd.IndexSlice[:,z],"FlowFB"]) for z in zones}
     # {z: df_np.loc[z, "NetPosFB"] - tmp[z]  for z in zones}
-    return df, df_np, domain_copy, prob.var_dict["Alpha"].value
\ No newline at end of file
+    return df, df_np, domain_copy, values["Alpha"]
+
+def correct_domain(domain, ram_correction, alpha):
+    """Apply the ELI results to the domain, i.e. RAM corrections and scaling with alpha.
+    
+    ELI calculation can cause issues, these are reflected in ram_corrections 
+    (that are expected to be very small).
+    """
+    domain.loc[ram_correction.index, "ram"] += ram_correction.ram
+    domain.loc[:, "ram"] *= alpha
+    if not ram_correction.empty:
+        cols = [c for c in ["cb", "co", "ram"] if c in domain.columns]
+        logger.info(f"RAM Correction\n{domain.loc[ram_correction.index, cols]}")
+    return domain
@@ -1,94 +1,113 @@
+import logging
+import os
+
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
 
-def create_fb_domain_plot(fb_domain, exchange, zones, lta_domain, alpha, show_plot=True, filepath=None):
-    """Create FlowBased Domain plot. 
-    This is a copy from POMATO. 
+from domain_viewer import metrics
+
+logger = logging.getLogger(__name__)
+
+HOVER_COLUMNS = ["cb", "co", "tso", "ram", "cbcos"]
+
+def line_trace_data(domain_equations, domain_data, cond):
+    """Coordinates and customdata of all lines in *cond* as single, NaN-separated arrays.
+
+    Each line of *domain_equations* (array of shape lines x 2 x points) is followed by a 
+    gap (NaN, None for customdata), so that all lines of a category are plotted by one trace. 
     """
-    fig = go.Figure()
-    n0_lines_x, n0_lines_y = [], []
-    n1_lines_x, n1_lines_y = [], []
+    equations = np.asarray(domain_equations, dtype=float)[np.asarray(cond)]
+    lines, points = len(equations), equations.shape[2]
+    coordinates = np.full((lines, 2, points + 1), np.nan)
+    coordinates[:, :, :points] = equations
+    customdata = np.repeat(
+        domain_data.loc[np.asarray(cond), HOVER_COLUMNS].to_numpy(dtype=object), points + 1, axis=0
+    )
+    customdata[points::points + 1] = None
+    return coordinates[:, 0].ravel(), coordinates[:, 1].ravel(), customdata
 
-    iva_x, iva_y = [], []
-    hover_data_n0, hover_data_n1, hover_data_iva = [], [], []
+def constraint_trace_data(fb_domain, hover_points=None, compact=False):
+    """Trace data (x, y, customdata) of the N-0, N-1 and IVA constraints of *fb_domain*.
 
-    hover_points = len(fb_domain.domain_equations[0][1])
+    Lines are straight, domains generated with steps=2 only hold their endpoints. As hover
+    labels only show at data points, *hover_points* resamples each line to that many points. 
+    With *compact* coordinates are stored as float32 (written as base64 typed arrays) and 
+    the hover RAM is rounded to the shown precision, which reduces the size of exported files.
+    Categories without constraints are omitted. 
+    """
     tmp = fb_domain.domain_data.reset_index(drop=True)
-    cond_basecase = tmp.co == "basecase"
-    cond_iva = (tmp.iva > 0)
-
-    for i in tmp[cond_basecase].index:
-        n0_lines_x.extend(fb_domain.domain_equations[i][0])
-        n0_lines_y.extend(fb_domain.domain_equations[i][1])
-        n0_lines_x.append(None)
-        n0_lines_y.append(None)
-        data = [tmp.loc[i, "cb"], tmp.loc[i, "co"], tmp.loc[i, "tso"], tmp.loc[i, "ram"]]
-        hover_data_n0.append(np.vstack([[data for n in range(0, hover_points)], [None]*len(data)]))
-    
-    for i in tmp[cond_iva].index:
-        iva_x.extend(fb_domain.domain_equations[i][0])
-        iva_y.extend(fb_domain.domain_equations[i][1])
-        iva_x.append(None)
-        iva_y.append(None)
-        data = [tmp.loc[i, "cb"], tmp.loc[i, "co"], tmp.loc[i, "tso"], tmp.loc[i, "ram"]]
-        hover_data_iva.append(np.vstack([[data for n in range(0, hover_points)], [None]*len(data)]))
-    
-    for i in tmp[(~cond_basecase)&(~cond_iva)].index:
-        n1_lines_x.extend(fb_domain.domain_equations[i][0])
-        n1_lines_y.extend(fb_domain.domain_equations[i][1])
-        n1_lines_x.append(None)
-        n1_lines_y.append(None)
-        data = [tmp.loc[i, "cb"], tmp.loc[i, "co"], tmp.loc[i, "tso"], tmp.loc[i, "ram"]]
-        hover_data_n1.append(np.vstack([[data for n in range(0, hover_points)], [None]*len(data)]))
+    domain_equations = np.asarray(fb_domain.domain_equations, dtype=float)
+    if hover_points:
+        domain_equations = np.linspace(
+            domain_equations[:, :, 0], domain_equations[:, :, -1], hover_points, axis=-1
+        )
+    if compact:
+        tmp = tmp.assign(ram=tmp.ram.round(2))
+    cond_basecase = (tmp.co == "basecase").values
+    cond_iva = (tmp.iva > 0).values
+    constraints = {
+        "N-0 Constraints": cond_basecase, 
+        "N-1 Constraints": (~cond_basecase)&(~cond_iva), 
+        "IVA": cond_iva
+    }
+    trace_data = {}
+    for name, cond in constraints.items():
+        if cond.any():
+            lines_x, lines_y, customdata = line_trace_data(domain_equations, tmp, cond)
+            if compact:
+                lines_x, lines_y = lines_x.astype(np.float32), lines_y.astype(np.float32)
+            trace_data[name] = (lines_x, lines_y, customdata)
+    return trace_data
 
+@metrics.span("create_fb_domain_plot")
+def create_fb_domain_plot(fb_domain, exchange, zones, lta_domain, alpha, show_plot=True, filepath=None,
+                          webgl_threshold=1000, hover_points=None, compact=False):
+    """Create FlowBased Domain plot. 
+    This is a copy from POMATO. 
 
-    print("Anz N-1 Constraints", sum((~cond_basecase)&(~cond_iva)))
-    print("Anz N-0 Constraints", sum(cond_basecase))
+    The constraints are plotted with WebGL (Scattergl) when more than *webgl_threshold*
+    lines are in the domain, SVG becomes unresponsive for thousands of lines. For 
+    *hover_points* and *compact* see :func:`constraint_trace_data`.
+    """
+    import plotly.graph_objects as go
+    fig = go.Figure()
+    tmp = fb_domain.domain_data
+    cond_basecase = (tmp.co == "basecase").values
+    cond_iva = (tmp.iva > 0).values
+    
+    logger.info(f"Anz N-1 Constraints {sum((~cond_basecase)&(~cond_iva))}")
+    logger.info(f"Anz N-0 Constraints {sum(cond_basecase)}")
 
     hovertemplate = "<br>".join(
         [
             "cb: %{customdata[0]}", 
             "co: %{customdata[1]}", 
             "tso: %{customdata[2]}", 
-            "ram: %{customdata[3]:.2f}"
+            "ram: %{customdata[3]:.2f}",
+            "CBCOs on line: %{customdata[4]}"
         ]) + "<extra></extra>"
 
-    if len(hover_data_n0) > 0:
-        fig.add_trace(
-            go.Scatter(
-                x=n0_lines_x, y=n0_lines_y, name='N-0 Constraints',
-                line = dict(width = 1.5, color="dimgray"),
-                mode="lines",
-                customdata=np.vstack(hover_data_n0),
-                hovertemplate=hovertemplate
-            )
-        )
-    
-    if len(hover_data_n1) > 0:
+    scatter = go.Scattergl if len(tmp) > webgl_threshold else go.Scatter
+    metrics.annotate(
+        lines=len(tmp), n_0=int(cond_basecase.sum()), n_1=int(((~cond_basecase)&(~cond_iva)).sum()), 
+        iva=int(cond_iva.sum()), webgl=scatter is go.Scattergl
+    )
+    lines = {
+        "N-0 Constraints": dict(width = 1.5, color="dimgray"),
+        "N-1 Constraints": dict(width = 1.5, color="lightgray"),
+        "IVA": dict(dash='dash', width = 1.5, color="royalblue"),
+    }
+    trace_data = constraint_trace_data(fb_domain, hover_points, compact)
+    for name, (lines_x, lines_y, customdata) in trace_data.items():
         fig.add_trace(
-            go.Scatter(
-                x=n1_lines_x, y=n1_lines_y, name='N-1 Constraints',
-                line = dict(width = 1.5, color="lightgray"),
+            scatter(
+                x=lines_x, y=lines_y, name=name,
+                line=lines[name],
                 mode="lines",
-                customdata=np.vstack(hover_data_n1),
-                hovertemplate=hovertemplate
-            )
-        )
-
-    if len(hover_data_iva) > 0:
-        fig.add_trace(
-            go.Scatter(
-                x=iva_x, 
-                y=iva_y,
-                name='IVA',
-                mode ="lines",
-                line = dict(dash='dash', width = 1.5, color="royalblue"),
-                customdata=np.vstack(hover_data_iva),
+                customdata=customdata,
                 hovertemplate=hovertemplate
             )
         )
-    
 
     fig.add_trace(
         go.Scatter(
@@ -128,3 +147,45 @@ def create_fb_domain_plot(fb_domain, exchange, zones, lta_domain, alpha, show_pl
         )
     )
     return fig
+
+def create_shift_slider_plot(incremental_domain, border, flows, exchange, zones, alpha, **kwargs):
+    """FlowBased Domain plot with a slider that shifts the non-depicted exchange *border*.
+
+    For each flow in *flows* the domain is recomputed by the 
+    :class:`~domain_viewer.fbmc_domain.IncrementalFBDomain`, the slider restyles the 
+    constraint and feasible region traces. The plot starts at the flow closest to the market
+    clearing point, kwargs are passed to :func:`create_fb_domain_plot`. 
+
+    All slider positions are embedded in the figure, the size grows with the number of 
+    *flows* and plotted lines (see *max_lines* of the incremental domain). 
+    """
+    active = int(np.argmin(np.abs(np.asarray(flows) - incremental_domain.flows[border])))
+    fb_domains = [incremental_domain.shift({border: flow}) for flow in flows]
+    fig = create_fb_domain_plot(fb_domains[active], exchange, zones, None, alpha, **kwargs)
+
+    hover_points, compact = kwargs.get("hover_points"), kwargs.get("compact", False)
+    shifted = [
+        i for i, trace in enumerate(fig.data) 
+        if trace.name in ["N-0 Constraints", "N-1 Constraints", "IVA", "FB Domain"]
+    ]
+    steps = []
+    for flow, fb_domain in zip(flows, fb_domains):
+        trace_data = constraint_trace_data(fb_domain, hover_points, compact)
+        trace_data["FB Domain"] = (*fb_domain.feasible_region_vertices.T, None)
+        update = {k: [] for k in ["x", "y", "customdata"]}
+        for i in shifted:
+            for k, values in zip(update, trace_data.get(fig.data[i].name, ([], [], []))):
+                update[k].append(values)
+        steps.append(dict(method="restyle", args=[update, shifted], label=f"{flow:.0f}"))
+
+    fig.update_layout(
+        sliders=[dict(active=active, currentvalue=dict(prefix=f"{' > '.join(border)}: "), steps=steps)]
+    )
+    return fig
+
+def write_domain_html(fig, filepath, **kwargs):
+    """Write *fig* as html file and report its size, kwargs are passed to fig.write_html."""
+    with metrics.span("write_domain_html") as span:
+        fig.write_html(filepath, **kwargs)
+        span.set(bytes=os.path.getsize(filepath))
+    logger.info(f"Written {filepath} ({os.path.getsize(filepath)/1e6:.2f} MB)")
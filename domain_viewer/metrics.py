@@ -0,0 +1,158 @@
+"""Named spans with wall time, CPU time and metrics of the pipeline stages, reported to sinks.
+
+    from domain_viewer import metrics
+    metrics.add_sink(metrics.JSONLinesSink("metrics.jsonl"))
+
+    with metrics.span("load_data", mtu=mtu.isoformat()) as s:
+        ...
+        s.set(rows=len(domain))
+
+Each finished span is passed as record (dict) to all sinks. Records hold the name of the span,
+its parent span, start timestamp, wall and CPU time, status ("ok" or the exception raised) and
+the attributes set on the span, e.g. rows, bytes, cache_hits/cache_misses or solver iterations.
+Without sinks a span only costs the timer calls.
+"""
+import contextvars
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+_sinks = []
+_current = contextvars.ContextVar("span", default=None)
+
+class Span():
+    """Running span, attributes are added with :meth:`set` and counted up with :meth:`add`"""
+    def __init__(self, name, parent=None, **attributes):
+        self.name = name
+        self.parent = parent
+        self.attributes = attributes
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add(self, **counters):
+        for k, v in counters.items():
+            self.attributes[k] = self.attributes.get(k, 0) + v
+
+def add_sink(sink):
+    """Report all spans to *sink*, an object with an emit(record) method"""
+    _sinks.append(sink)
+    return sink
+
+def remove_sink(sink):
+    _sinks.remove(sink)
+
+def current():
+    """The innermost running span of this context, or None"""
+    return _current.get()
+
+def annotate(**attributes):
+    """Set attributes of the innermost running span, without span this does nothing"""
+    span = _current.get()
+    if span is not None:
+        span.set(**attributes)
+
+@contextmanager
+def span(name, **attributes):
+    """Measure the enclosed block as span *name* and report it to all sinks"""
+    parent = _current.get()
+    s = Span(name, parent.name if parent is not None else None, **attributes)
+    token = _current.set(s)
+    status = "ok"
+    start, start_wall, start_cpu = time.time(), time.perf_counter(), time.process_time()
+    try:
+        yield s
+    except BaseException as e:
+        status = type(e).__name__
+        raise
+    finally:
+        _current.reset(token)
+        record = {
+            "span": s.name, "parent": s.parent, "start": start, "pid": os.getpid(),
+            "wall_time": time.perf_counter() - start_wall,
+            "cpu_time": time.process_time() - start_cpu,
+            "status": status, **s.attributes,
+        }
+        for sink in _sinks:
+            sink.emit(record)
+
+class JSONLinesSink():
+    """Append each span as JSON line to the file *path*"""
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+
+    def emit(self, record):
+        line = json.dumps(record, default=str)
+        with self.lock, open(self.path, "a") as f:
+            f.write(line + "\n")
+
+class PrometheusSink():
+    """Aggregate spans into counters in the Prometheus text format.
+
+    For each span name the number of spans by status, the wall and CPU seconds and the sum of
+    all numeric attributes are counted. With *path* the text file is rewritten after each span,
+    e.g. for the textfile collector of the node exporter, otherwise see :meth:`render`.
+    """
+    def __init__(self, path=None, prefix="domain_viewer"):
+        self.path = Path(path) if path is not None else None
+        self.prefix = prefix
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def emit(self, record):
+        span = record["span"]
+        values = {
+            ("spans_total", ("status", record["status"])): 1,
+            ("wall_seconds_total", None): record["wall_time"],
+            ("cpu_seconds_total", None): record["cpu_time"],
+        }
+        for k, v in record.items():
+            if k not in ["start", "pid", "wall_time", "cpu_time"] and isinstance(v, (int, float)) and not isinstance(v, bool):
+                values[(f"{re.sub('[^a-zA-Z0-9_]', '_', k)}_total", None)] = v
+        with self.lock:
+            for (metric, label), v in values.items():
+                key = (metric, span, label)
+                self.counters[key] = self.counters.get(key, 0) + v
+            if self.path is not None:
+                self.write(self.path)
+
+    def render(self):
+        """All counters in the Prometheus text exposition format"""
+        lines = []
+        for metric in sorted({k[0] for k in self.counters}):
+            name = f"{self.prefix}_{metric}"
+            lines.append(f"# TYPE {name} counter")
+            for (m, span, label), v in sorted(self.counters.items(), key=lambda x: (x[0][1], str(x[0][2]))):
+                if m == metric:
+                    labels = f'span="{span}"' + (f',{label[0]}="{label[1]}"' if label else "")
+                    lines.append(f"{name}{{{labels}}} {v:.6g}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write the counters to *path*, replacing the file atomically"""
+        tmp_path = Path(f"{path}.tmp")
+        tmp_path.write_text(self.render())
+        os.replace(tmp_path, path)
+
+class LoggingSink():
+    """Log each span with its times and attributes to *logger*"""
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logger or logging.getLogger(__name__)
+        self.level = level
+
+    def emit(self, record):
+        attributes = " ".join(
+            f"{k}={v}" for k, v in record.items()
+            if k not in ["span", "parent", "start", "pid", "wall_time", "cpu_time", "status"]
+        )
+        self.logger.log(
+            self.level, "%s %s wall %.3fs cpu %.3fs %s",
+            record["span"], record["status"], record["wall_time"], record["cpu_time"], attributes
+        )
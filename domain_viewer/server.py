@@ -0,0 +1,263 @@
+"""Local HTTP server for flow-based domain figures and data.
+
+The server keeps processed mtus (domain, ELI results) and projected domains in an in-memory LRU
+cache bounded by memory, so that repeated requests and requests for other axis pairs of the
+same mtu are answered without reading the cache files or solving the ELI problem again. ELI is
+warm-started from the previously solved mtu (see ELISequence), which speeds up neighbouring
+mtus. Concurrent requests for the same mtu or domain are coalesced into one computation.
+
+    python -m domain_viewer.server --port 8050 --max-memory 1000
+
+Endpoints, with the query parameters mtu (local time, e.g. 2025-07-07T19:00), x and y (axis,
+e.g. DE-FR) and optionally shift_mcp (1 or 0, by default 1):
+
+    /domain   Domain data as JSON: feasible region, plotted constraints and market clearing points
+    /figure   Plotly figure as JSON
+    /plot     Plotly figure as html page
+    /stats    Cache statistics
+"""
+import argparse
+import json
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+import pandas as pd
+
+from domain_viewer import metrics
+from domain_viewer.data_processing import (
+    ZONES, PLOT_COLUMNS, load_data, parse_axis, parse_mtu, prepare_exchange
+)
+from domain_viewer.extended_lta_inclusion import ELISequence, correct_domain
+from domain_viewer.fbmc_domain import FBDomainPlots
+from domain_viewer.fbmc_domain_plot import create_fb_domain_plot
+
+logger = logging.getLogger(__name__)
+
+def nbytes(obj, seen=None):
+    """Approximate memory of *obj*, following containers and object attributes"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        size = obj.memory_usage(deep=True)
+        return int(size.sum()) if isinstance(size, pd.Series) else int(size)
+    elif isinstance(obj, np.ndarray):
+        return obj.nbytes
+    elif isinstance(obj, (bytes, str)):
+        return len(obj)
+    elif isinstance(obj, dict):
+        return sum(nbytes(k, seen) + nbytes(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        return sum(nbytes(v, seen) for v in obj)
+    elif hasattr(obj, "__dict__"):
+        return nbytes(vars(obj), seen)
+    return sys.getsizeof(obj)
+
+class MemoryLRU():
+    """Thread-safe LRU cache holding at most *max_bytes* (as estimated by :func:`nbytes`).
+
+    :meth:`get_or_compute` coalesces concurrent requests of a missing key, the value is
+    computed once and all requests wait for it. Errors are passed to all waiting requests
+    and not cached.
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.pending = {}
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.statistics = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+
+    def get_or_compute(self, key, compute):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.statistics["hits"] += 1
+                return self.entries[key][0]
+            if key in self.pending:
+                future, owner = self.pending[key], False
+                self.statistics["coalesced"] += 1
+            else:
+                future, owner = Future(), True
+                self.pending[key] = future
+                self.statistics["misses"] += 1
+        if not owner:
+            return future.result()
+        try:
+            value = compute()
+        except BaseException as e:
+            with self.lock:
+                del self.pending[key]
+            future.set_exception(e)
+            raise
+        self.put(key, value)
+        with self.lock:
+            del self.pending[key]
+        future.set_result(value)
+        return value
+
+    def put(self, key, value):
+        size = nbytes(value)
+        with self.lock:
+            if key in self.entries:
+                self.bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size)
+            self.bytes += size
+            # Evict the least recently used entries, keeping at least the new one
+            while self.bytes > self.max_bytes and len(self.entries) > 1:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.statistics["evictions"] += 1
+
+    def stats(self):
+        with self.lock:
+            return {"entries": len(self.entries), "bytes": self.bytes, "max_bytes": self.max_bytes, **self.statistics}
+
+class DomainService():
+    """Processed mtus and domains, cached in a :class:`MemoryLRU` of *max_bytes*.
+
+    For each mtu the data is loaded (or downloaded) with :func:`load_data` and the ELI problem
+    is solved once, the projected domains of all axis pairs and their figures are cached
+    separately. Figures are created in the compact format, see :func:`create_fb_domain_plot`.
+    """
+    def __init__(self, request_session=None, max_bytes=int(1e9), zones=ZONES):
+        self.request_session = request_session
+        self.zones = zones
+        self.cache = MemoryLRU(max_bytes)
+        self.eli = ELISequence(zones)
+        self.eli_lock = threading.Lock()
+
+    def mtu_state(self, mtu):
+        """Corrected domain (as FBDomainPlots), ELI exchange and alpha of *mtu*"""
+        return self.cache.get_or_compute(("mtu", mtu.isoformat()), lambda: self.process_mtu(mtu))
+
+    def process_mtu(self, mtu):
+        data = load_data(mtu, self.request_session, columns=PLOT_COLUMNS)
+        mcp = data["mcp"].loc[mtu.isoformat()]
+        exchange = prepare_exchange(data["exchange"], mcp, mtu)
+        with self.eli_lock:
+            eli_exchange, _, ram_correction, alpha = self.eli.solve(
+                data["domain"], data["lta"], mcp, exchange, mtu=mtu.isoformat()
+            )
+        domain = correct_domain(data["domain"], ram_correction, alpha)
+        return {"fbmc": FBDomainPlots(self.zones, domain), "exchange": eli_exchange, "alpha": float(alpha)}
+
+    def fb_domain(self, mtu, domain_x, domain_y, shift_mcp=True):
+        """FBDomain of one axis pair, shifted to the market clearing point with *shift_mcp*"""
+        def compute():
+            state = self.mtu_state(mtu)
+            return state["fbmc"].generate_flowbased_domain(
+                domain_x, domain_y, mtu, exchange=state["exchange"] if shift_mcp else None, steps=2
+            )
+        return self.cache.get_or_compute(("domain", mtu.isoformat(), *domain_x, *domain_y, shift_mcp), compute)
+
+    def figure(self, mtu, domain_x, domain_y, shift_mcp=True):
+        """Plotly figure of the domain"""
+        state = self.mtu_state(mtu)
+        fb_domain = self.fb_domain(mtu, domain_x, domain_y, shift_mcp)
+        return create_fb_domain_plot(
+            fb_domain, state["exchange"], self.zones, None, state["alpha"], show_plot=False,
+            hover_points=5, compact=True
+        )
+
+    def response(self, kind, mtu, domain_x, domain_y, shift_mcp=True):
+        """Serialised response of *kind* (domain, figure or plot), cached as bytes"""
+        def compute():
+            if kind == "domain":
+                return self.domain_json(mtu, domain_x, domain_y, shift_mcp).encode()
+            fig = self.figure(mtu, domain_x, domain_y, shift_mcp)
+            if kind == "figure":
+                return fig.to_json().encode()
+            return fig.to_html(include_plotlyjs="cdn").encode()
+        return self.cache.get_or_compute(("response", kind, mtu.isoformat(), *domain_x, *domain_y, shift_mcp), compute)
+
+    def domain_json(self, mtu, domain_x, domain_y, shift_mcp=True):
+        """Feasible region, plotted constraints (with line endpoints) and market clearing points"""
+        state = self.mtu_state(mtu)
+        fb_domain = self.fb_domain(mtu, domain_x, domain_y, shift_mcp)
+        exchange = state["exchange"]
+        mcp = {}
+        for col, name in [("Flow", "ELI"), ("FlowFB", "FB")]:
+            mcp[name] = [
+                float(exchange.loc[tuple(axis), col] - exchange.loc[tuple(axis[::-1]), col])
+                for axis in [domain_x, domain_y]
+            ]
+        equations = np.asarray(fb_domain.domain_equations, dtype=float)
+        columns = [c for c in ["cb", "co", "tso", "ram", "iva", "in_domain", "cbcos"] if c in fb_domain.domain_data.columns]
+        constraints = fb_domain.domain_data[columns].assign(
+            x0=equations[:, 0, 0], y0=equations[:, 1, 0], x1=equations[:, 0, -1], y1=equations[:, 1, -1]
+        )
+        return json.dumps({
+            "mtu": mtu.isoformat(), "domain_x": domain_x, "domain_y": domain_y, "shift_mcp": shift_mcp,
+            "alpha": state["alpha"], "market_clearing_point": mcp,
+            "plot_limits": {"x": [fb_domain.x_min, fb_domain.x_max], "y": [fb_domain.y_min, fb_domain.y_max]},
+            "feasible_region_vertices": fb_domain.feasible_region_vertices.tolist(),
+            # to_json converts the numpy and pandas types (and NaN to null) of the records
+            "constraints": json.loads(constraints.to_json(orient="records")),
+        })
+
+class DomainRequestHandler(BaseHTTPRequestHandler):
+    """Serve the endpoints of :class:`DomainService`, see the module docstring"""
+    content_types = {"domain": "application/json", "figure": "application/json", "plot": "text/html"}
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        kind = url.path.strip("/")
+        with metrics.span("server_request", path=url.path) as span:
+            try:
+                if kind == "stats":
+                    body, content_type = json.dumps(self.server.service.cache.stats()).encode(), "application/json"
+                elif kind in self.content_types:
+                    query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                    if not {"mtu", "x", "y"}.issubset(query):
+                        raise ValueError("Query parameters mtu, x and y are required")
+                    body = self.server.service.response(
+                        kind, parse_mtu(query["mtu"]), parse_axis(query["x"]), parse_axis(query["y"]),
+                        query.get("shift_mcp", "1") not in ["0", "false"]
+                    )
+                    content_type = self.content_types[kind]
+                else:
+                    self.send_error(404, f"Unknown endpoint {url.path}")
+                    span.set(status_code=404)
+                    return
+                status_code = 200
+            except (ValueError, KeyError, AttributeError) as e:
+                status_code, body, content_type = 400, json.dumps({"error": str(e)}).encode(), "application/json"
+            except Exception as e:
+                logger.exception("Request %s failed", self.path)
+                status_code, body, content_type = 500, json.dumps({"error": str(e)}).encode(), "application/json"
+            span.set(status_code=status_code, bytes=len(body))
+        self.send_response(status_code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+def create_server(host="127.0.0.1", port=8050, service=None, **kwargs):
+    """HTTP server of a :class:`DomainService`, kwargs are passed to the service"""
+    server = ThreadingHTTPServer((host, port), DomainRequestHandler)
+    server.daemon_threads = True
+    server.service = service or DomainService(**kwargs)
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--max-memory", type=float, default=1000, help="Cache size in MB")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    server = create_server(args.host, args.port, max_bytes=int(args.max_memory*1e6))
+    logger.info(f"Serving flow-based domains on http://{args.host}:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,95 @@
+import logging
+import os
+import uuid
+from pathlib import Path
+
+import pandas as pd
+
+TABLES = ["domain", "mcp", "lta", "ltn", "exchange"]
+DATA_DIR = Path("data")
+logger = logging.getLogger(__name__)
+
+def mtu_key(mtu):
+    """File name of an mtu partition, the mtu in UTC (windows-safe, unique across DST)"""
+    return pd.Timestamp(mtu).tz_convert("UTC").strftime("%Y%m%dT%H%MZ")
+
+def partition_path(table, mtu, data_dir=None):
+    """Path of the partition of *table* for *mtu*.
+
+    The cache is partitioned by business day, each mtu is stored in its own Arrow (feather)
+    file, i.e. data/{table}/{business_day}/{mtu_key}.feather. The directory structure serves
+    as mtu index, appending an mtu writes one new file and reading an mtu touches only its
+    own file.
+    """
+    mtu = pd.Timestamp(mtu)
+    data_dir = Path(data_dir or DATA_DIR)
+    return data_dir.joinpath(table, mtu.strftime("%Y-%m-%d"), f"{mtu_key(mtu)}.feather")
+
+def is_cached(mtu, data_dir=None):
+    """Check if *mtu* is in the cache.
+
+    The domain table is written last for each mtu, therefore marks a complete partition.
+    """
+    migrate_legacy_cache(data_dir)
+    return partition_path("domain", mtu, data_dir).is_file()
+
+def write_partition(df, path):
+    """Write *df* to *path* atomically, so that readers never see partial files.
+
+    Partitions are stored uncompressed, so they can be memory-mapped without copy. 
+    Categorical columns are dictionary-encoded with only the categories used in *df*.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    df = df.reset_index(drop=True)
+    for c in df.select_dtypes("category").columns:
+        df[c] = df[c].cat.remove_unused_categories()
+    df.to_feather(tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+
+def write_partitions(data, data_dir=None):
+    """Write processed tables, possibly containing many mtus, into their mtu partitions.
+
+    *data* is a dict of table name to DataFrame with an mtu column or index level.
+    Existing partitions of the same mtu are replaced.
+    """
+    for k in sorted(data.keys(), key=lambda k: k == "domain"):
+        df = data[k].reset_index()
+        for mtu, mtu_df in df.groupby("mtu", sort=False, observed=True):
+            write_partition(mtu_df, partition_path(k, mtu, data_dir))
+
+def read_partition(table, mtu, columns=None, data_dir=None):
+    """Read the partition of *table* for *mtu*, optionally only the given *columns*.
+
+    The mtu filter is resolved to the partition file before anything is read. The file 
+    is memory-mapped and only the buffers of the selected columns are touched, numeric 
+    columns are handed to pandas without copy (split_blocks). Memory and time therefore 
+    scale with the requested data, not with the size of the cache. Requested columns that
+    the partition does not contain (e.g. written by earlier versions) are skipped.
+    """
+    from pyarrow import feather
+    migrate_legacy_cache(data_dir)
+    arrow_table = feather.read_table(partition_path(table, mtu, data_dir), memory_map=True)
+    if columns is not None:
+        arrow_table = arrow_table.select([c for c in columns if c in arrow_table.column_names])
+    return arrow_table.to_pandas(split_blocks=True)
+
+def migrate_legacy_cache(data_dir=None):
+    """Migrate the single-file feather cache (data/{table}.db) into mtu partitions.
+
+    Each legacy file is split into its mtus and renamed to data/{table}.db.migrated
+    afterwards, so the migration runs only once.
+    """
+    data_dir = Path(data_dir or DATA_DIR)
+    legacy_files = {k: data_dir.joinpath(f"{k}.db") for k in TABLES}
+    legacy_files = {k: f for k, f in legacy_files.items() if f.is_file()}
+    if not legacy_files:
+        return
+    logger.info("Migrating cache to mtu partitions")
+    for k in sorted(legacy_files.keys(), key=lambda k: k == "domain"):
+        df = pd.read_feather(legacy_files[k])
+        for mtu, mtu_df in df.groupby("mtu", sort=False):
+            path = partition_path(k, mtu, data_dir)
+            if not path.is_file():
+                write_partition(mtu_df, path)
+        legacy_files[k].rename(legacy_files[k].with_suffix(".db.migrated"))
@@ -0,0 +1,279 @@
+"""Volume of the flow-based domain {x : A x <= b, sum x = 0} in the space of net positions.
+
+The domain is parameterised in an orthonormal basis of the balanced net positions (sum x = 0),
+so the volume is measured within that hyperplane, in MW^(zones - 1). Small instances are
+computed exactly by vertex enumeration, larger ones are estimated with multiphase Monte-Carlo
+using vectorised hit-and-run walks, along with the standard error of the estimate.
+"""
+import highspy
+import numpy as np
+from scipy.spatial import ConvexHull
+from scipy.special import gammaln
+
+from domain_viewer.fbmc_domain import NotAPolytopeError, compute_polytope_vertices
+
+def balanced_basis(n):
+    """Orthonormal basis (n x n-1) of the subspace sum x = 0."""
+    q, _ = np.linalg.qr(np.eye(n) - 1/n)
+    return q[:, :n - 1]
+
+def ball_volume(dimension, radius):
+    """Volume of a ball in *dimension* dimensions."""
+    return np.exp(dimension/2*np.log(np.pi) - gammaln(dimension/2 + 1) + dimension*np.log(radius))
+
+def exact_volume(A, b):
+    """Volume of the polytope A y <= b via vertex enumeration and convex hull triangulation."""
+    vertices = np.array(compute_polytope_vertices(A, b))
+    return ConvexHull(vertices).volume
+
+def bounding_box(A, b, rows=None, max_value=1e7):
+    """Chebyshev center, radius and the bounding box of the polytope A y <= b.
+
+    The inscribed ball and the 2 x dimension box LPs are solved by one HiGHS instance, each
+    LP only changes the objective and is warm-started from the previous basis. The LPs start
+    with the *rows* constraints closest to the origin (all by default), constraints violated 
+    by a solution are added until it satisfies all of them. Variables are bounded by 
+    *max_value*, a polyhedron that reaches the bound is not considered a polytope.
+    """
+    m, d = A.shape
+    norm = np.linalg.norm(A, axis=1)
+    matrix = np.hstack([A, norm[:, None]])
+    inf = highspy.kHighsInf
+
+    h = highspy.Highs()
+    h.setOptionValue("output_flag", False)
+    h.addVars(d + 1, np.r_[np.full(d, -max_value), 0.0], np.full(d + 1, max_value))
+    included = np.zeros(m, dtype=bool)
+
+    def add_rows(new):
+        included[new] = True
+        h.addRows(
+            len(new), np.full(len(new), -inf), b[new].astype(float),
+            len(new)*(d + 1), np.arange(0, len(new)*(d + 1), d + 1, dtype=np.int32), 
+            np.tile(np.arange(d + 1, dtype=np.int32), len(new)), matrix[new].ravel()
+        )
+
+    def solve(cost):
+        h.changeColsCost(d + 1, np.arange(d + 1, dtype=np.int32), cost)
+        while True:
+            h.run()
+            if h.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+                raise NotAPolytopeError("Polyhedron is not a polytope")
+            solution = np.array(h.getSolution().col_value)
+            violated = np.flatnonzero((np.dot(matrix, solution) > b + 1e-6) & ~included)
+            if len(violated) == 0:
+                break
+            add_rows(violated)
+        if np.abs(solution[:d]).max() >= max_value*(1 - 1e-9):
+            raise NotAPolytopeError("Polyhedron is not a polytope")
+        return solution
+
+    add_rows(np.argsort(b/norm)[:rows])
+    chebyshev = solve(np.r_[np.zeros(d), -1.0])
+    center, radius = chebyshev[:d], chebyshev[d]
+    # The box LPs keep the radius column at zero
+    h.changeColBounds(d, 0.0, 0.0)
+    lower, upper = np.empty(d), np.empty(d)
+    for i in range(d):
+        for sign, bound in [(1.0, lower), (-1.0, upper)]:
+            cost = np.zeros(d + 1)
+            cost[i] = sign
+            bound[i] = solve(cost)[i]
+    return center, radius, lower, upper
+
+def hit_and_run(A, b, points, slack, center, radius, inner_radius, steps, rng, scale=None):
+    """Advance the walkers *points* (walkers x d) by *steps* hit-and-run steps in P n B(center, radius).
+
+    All walkers move at once. *slack* (b - A y for each walker) is updated along with the
+    points. Directions are drawn from a normal distribution, optionally with covariance 
+    scale scale^T, which keeps the uniform distribution stationary and mixes faster in 
+    elongated polytopes if it follows their shape. 
+
+    Returns for each step and walker the share of the chord within the inner ball 
+    B(center, inner_radius), i.e. the probability that the next point lies in the inner ball. 
+    """
+    walkers, d = points.shape
+    inside = np.empty((steps, walkers))
+    for step in range(steps):
+        direction = rng.standard_normal((walkers, d))
+        if scale is not None:
+            direction = np.dot(direction, scale.T)
+        direction /= np.linalg.norm(direction, axis=1)[:, None]
+        rate = np.dot(A, direction.T)
+        # With positive slack the chord ends at the constraints with the largest rate/slack 
+        # in the positive and the smallest in the negative direction
+        inverse_bound = rate/slack
+        inverse_max, inverse_min = inverse_bound.max(axis=0), inverse_bound.min(axis=0)
+        with np.errstate(divide="ignore"):
+            t_max = np.where(inverse_max > 0, 1/inverse_max, np.inf)
+            t_min = np.where(inverse_min < 0, 1/inverse_min, -np.inf)
+        # |y + t u - c| <= radius
+        offset = points - center
+        p = (direction*offset).sum(axis=1)
+        q = (offset*offset).sum(axis=1) - radius**2
+        root = np.sqrt(np.maximum(p**2 - q, 0))
+        t_max = np.minimum(t_max, -p + root)
+        t_min = np.maximum(t_min, -p - root)
+        inner_root = np.sqrt(np.maximum(p**2 - (offset*offset).sum(axis=1) + inner_radius**2, 0))
+        inner = np.minimum(t_max, -p + inner_root) - np.maximum(t_min, -p - inner_root)
+        inside[step] = np.maximum(inner, 0)/(t_max - t_min)
+        t = t_min + (t_max - t_min)*rng.random(walkers)
+        points += t[:, None]*direction
+        slack -= rate*t
+    return inside
+
+def round_polytope(A, b, center, radius, walkers, steps, rng, rounds=10, tolerance=2):
+    """Affine map y = shift + L z under which the polytope A y <= b is close to isotropic.
+
+    Walkers start uniformly in the inscribed ball B(center, radius) and take *steps* 
+    hit-and-run steps in the mapped polytope, the covariance of the second half of their 
+    positions refines the map. This is repeated until the axes of the covariance differ 
+    by less than a factor *tolerance*, at most *rounds* times. Returns shift, L and the 
+    positions z of the walkers, which are close to uniformly distributed in the polytope.
+    """
+    d = A.shape[1]
+    shift, L = center.copy(), np.eye(d)
+    direction = rng.standard_normal((walkers, d))
+    direction /= np.linalg.norm(direction, axis=1)[:, None]
+    points = direction*radius*rng.random((walkers, 1))**(1/d)
+    for _ in range(rounds):
+        A_z, b_z = np.dot(A, L), b - np.dot(A, shift)
+        slack = b_z[:, None] - np.dot(A_z, points.T)
+        samples = []
+        for step in range(steps):
+            hit_and_run(A_z, b_z, points, slack, 0, np.inf, np.inf, 1, rng)
+            if step >= steps//2:
+                samples.append(points.copy())
+        samples = np.concatenate(samples)
+        mean = samples.mean(axis=0)
+        transform = np.linalg.cholesky(np.cov(samples.T))
+        shift, L = shift + np.dot(L, mean), np.dot(L, transform)
+        points = np.linalg.solve(transform, (points - mean).T).T
+        axes = np.linalg.svd(transform, compute_uv=False)
+        if axes.max() < tolerance*axes.min():
+            break
+    return shift, L, points
+
+def estimate_volume(A, b, walkers=100, steps=15, phase_ratio=4, burn_in=None, seed=0, 
+                    bounding_rows=None, error=0.05, max_steps=None, return_error=False):
+    """Multiphase Monte-Carlo estimate of the volume of the polytope A y <= b.
+
+    The polytope is first mapped close to isotropic position (:func:`round_polytope`), 
+    otherwise the walkers do not reach the far ends of elongated domains. Starting from the 
+    largest inscribed ball B_0, balls B_k around its center grow by phase_ratio^(1/d) in 
+    radius until they contain a share of 1 - 1/phase_ratio of the walkers of the rounding, 
+    the last phase walks in the polytope P itself (B_k of infinite radius). The volume of P
+    is the volume of B_0 times the product of the ratios vol(P n B_k)/vol(P n B_k-1), each 
+    estimated as the share of hit-and-run samples in P n B_k that lie within B_k-1. The walkers of each phase continue 
+    from the previous phase, take *burn_in* steps (3 x dimension) before sampling, draw 
+    directions following the covariance of the walkers at its start and only walk on the 
+    constraints that can bind within B_k.
+
+    The standard error of each ratio follows from the spread of the walker means (the 
+    walkers are independent), the relative standard error of the volume from the sum of 
+    their relative variances. Each phase samples *steps* steps and continues in blocks of
+    *steps* until its ratio reaches the relative standard *error*/sqrt(phases), at most 
+    *max_steps* (50 x steps) steps. The returned standard error is that of the actual 
+    samples, i.e. larger than *error* if max_steps was reached.
+
+    With the defaults the errors compared to exact volumes are rms 3-4% (at most 8.5%) on 
+    random polytopes with 40 constraints per dimension in 4 to 6 dimensions and rms 5-6% on 
+    rotated boxes with side ratios up to 25 in 13 dimensions (the CORE domain). Without 
+    error target (error=None, fixed 15 steps) the rms error is 4-7% in 4 to 6 dimensions, at
+    most 16%. The standard error matches the observed deviations (z-scores with standard 
+    deviation 0.75-1.1), it does not include a possible bias of too short walks.
+
+    Returns the volume, with *return_error* the volume and its standard error.
+    """
+    d = A.shape[1]
+    rng = np.random.default_rng(seed)
+    burn_in = 3*d if burn_in is None else burn_in
+    center, radius, _, _ = bounding_box(A, b, bounding_rows or 20*d)
+    shift, L, samples = round_polytope(A, b, center, radius, walkers, burn_in + steps, rng)
+    A, b = np.dot(A, L), b - np.dot(A, shift)
+    center, radius, lower, upper = bounding_box(A, b, bounding_rows or 20*d)
+    cover = np.quantile(np.linalg.norm(samples - center, axis=1), 1 - 1/phase_ratio)
+    phases = max(int(np.ceil(d*np.log(cover/radius)/np.log(phase_ratio))), 0) + 1
+    radii = np.r_[radius*phase_ratio**(np.arange(phases)/d), np.inf]
+
+    # Constraints that hold on the whole (slightly enlarged) bounding box are redundant
+    box_center, box_half = (lower + upper)/2, (upper - lower)/2*(1 + 1e-6)
+    redundant = np.dot(A, box_center) + np.dot(np.abs(A), box_half) < b
+    A, b = A[~redundant], b[~redundant]
+
+    # Within B_k only constraints closer to the center than its radius can be binding, 
+    # sorted by distance each phase walks on a prefix of the constraints.
+    distance = (b - np.dot(A, center))/np.linalg.norm(A, axis=1)
+    rows = np.argsort(distance)
+    A, b, distance = A[rows], b[rows], distance[rows]
+    binding = np.searchsorted(distance, radii, side="right")
+
+    # Uniform start in the inscribed ball
+    direction = rng.standard_normal((walkers, d))
+    direction /= np.linalg.norm(direction, axis=1)[:, None]
+    points = center + direction*radius*rng.random((walkers, 1))**(1/d)
+    slack = b[:binding[0], None] - np.dot(A[:binding[0]], points.T)
+
+    phase_error = error/np.sqrt(max(phases, 1)) if error is not None else np.inf
+    max_steps = max_steps or 50*steps
+    log_volume = np.log(ball_volume(d, radius)) + np.linalg.slogdet(L)[1]
+    log_variance = 0.0
+    for k in range(1, phases + 1):
+        new = slice(binding[k - 1], binding[k])
+        slack = np.vstack([slack, b[new, None] - np.dot(A[new], points.T)])
+        scale = np.linalg.cholesky(np.cov(points.T) + 1e-9*radius**2*np.eye(d))
+        def walk(steps):
+            return hit_and_run(
+                A[:binding[k]], b[:binding[k]], points, slack, center, radii[k], radii[k - 1], 
+                steps, rng, scale
+            )
+        # The walkers start in the inner ball
+        walk(burn_in)
+        inside = walk(steps)
+        while True:
+            walker_mean = inside.mean(axis=0)
+            ratio = walker_mean.mean()
+            relative_variance = walker_mean.var(ddof=1)/walkers/ratio**2
+            if relative_variance <= phase_error**2 or len(inside) + steps > max_steps:
+                break
+            inside = np.vstack([inside, walk(steps)])
+        log_volume -= np.log(ratio)
+        log_variance += relative_variance
+    volume = np.exp(log_volume)
+    if return_error:
+        return volume, volume*np.sqrt(log_variance)
+    return volume
+
+def domain_volume(ptdf, ram, method="auto", exact_dimension=5, **kwargs):
+    """Volume of the flow-based domain {x : ptdf x <= ram, sum x = 0}.
+
+    Parameters
+    ----------
+    ptdf : array, shape=(m, zones)
+        Zonal PTDF.
+    ram : array, shape=(m,)
+        RAMs, strictly positive.
+    method : str, optional
+        "exact", "estimate" or "auto", which computes the volume exactly for domains of
+        up to *exact_dimension* dimensions (zones - 1), by default "auto".
+    kwargs :
+        Passed to :func:`estimate_volume`, with return_error=True the volume and its 
+        standard error are returned (zero if computed exactly).
+    """
+    A = np.dot(ptdf, balanced_basis(ptdf.shape[1]))
+    b = np.asarray(ram, dtype=float)
+    # Duplicate directions, only the tightest constraint matters
+    norm = np.linalg.norm(A, axis=1)
+    A, b, norm = A[norm > 0], b[norm > 0], norm[norm > 0]
+    _, direction = np.unique(np.round(A/norm[:, None], 9), axis=0, return_inverse=True)
+    tightest = np.lexsort((b/norm, direction.ravel()))
+    tightest = tightest[np.r_[True, np.diff(direction.ravel()[tightest]) != 0]]
+    A, b = A[tightest], b[tightest]
+
+    if method == "exact" or (method == "auto" and A.shape[1] <= exact_dimension):
+        volume = exact_volume(A, b)
+        return (volume, 0.0) if kwargs.get("return_error") else volume
+    elif method in ["estimate", "auto"]:
+        return estimate_volume(A, b, **kwargs)
+    else:
+        raise AttributeError(f"Unknown volume method {method}")
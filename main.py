@@ -1,15 +1,13 @@
 import datetime as dt
+import logging
+import numpy as np
 import pandas as pd
-import requests
-from pathlib import Path
-from plotly.offline import plot
 
-import json
-
-from domain_viewer.data_processing import load_data, ZONES, add_alegro_exchange
+from domain_viewer import metrics
+from domain_viewer.data_processing import load_data, ZONES, PLOT_COLUMNS, prepare_exchange
 from domain_viewer.fbmc_domain import FBDomainPlots
-from domain_viewer.extended_lta_inclusion import calculate_FB_exchange
-from domain_viewer.fbmc_domain_plot import create_fb_domain_plot
+from domain_viewer.extended_lta_inclusion import calculate_FB_exchange, correct_domain
+from domain_viewer.fbmc_domain_plot import create_fb_domain_plot, create_shift_slider_plot, write_domain_html
 
 if __name__ == "__main__":
 
@@ -19,46 +17,34 @@ if __name__ == "__main__":
     domain_x = ["DE", "FR"] # Domain x-Axis
     domain_y = ["DE", "AT"] # Domain y-Axis
     shift_mcp = True # Shift Domain to Market Clearing Point 
+    compact_export = True # Store lines as endpoints and coordinates as float32 in the html file
+    slider_border = None # Non-depicted exchange shifted by a slider, e.g. ("AT", "CZ"), requires shift_mcp
+    metrics_file = None # Append timing and metrics of all stages as JSON lines, e.g. "metrics.jsonl"
 
-    request_session = requests.Session()
-    request_session.headers.update({
-        'user-agent': 'riw@50Hertz',
-        'Authorization': 'DomainViewer'
-    })
-    
-    # Read Proxy File if it exists. 
-    if Path.cwd().joinpath("proxy.json").is_file():
-        with open(Path.cwd().joinpath("proxy.json"), 'r') as f:
-            proxy = json.load(f)
-        request_session.proxies.update(proxy)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if metrics_file:
+        metrics.add_sink(metrics.JSONLinesSink(metrics_file))
 
     mtu = pd.Timestamp(
         dt.datetime.strptime(f"{date}T{str(hour).zfill(2)}", "%Y-%m-%dT%H")
         ).tz_localize("Europe/Berlin")
     print(mtu)
 
-    # Read Data from JAO
-    data = load_data(mtu, request_session)
+    # Read Data from JAO, the request session (with the Proxy File if it exists) is only 
+    # created if the mtu is not cached
+    data = load_data(mtu, None, columns=PLOT_COLUMNS)
     domain = data["domain"].copy()
     mcp = data["mcp"].loc[mtu.isoformat()]
     lta = data["lta"]
 
-    exchange = add_alegro_exchange(data["exchange"], mcp, mtu)
-    cond = (
-        exchange.index.get_level_values("from").isin(ZONES)
-        &exchange.index.get_level_values("to").isin(ZONES)
-    )
-    exchange = exchange[cond]
+    exchange = prepare_exchange(data["exchange"], mcp, mtu)
 
     # Calculate Extended LTA Inclusion (ELI) Flow Components
     eli_exchange, eli_np, ram_correction, alpha = calculate_FB_exchange(domain, lta, ZONES, mcp, exchange)
     
     # ELI calculation can cause issues, these are reflected in ram_corrections 
     # (that are expected to be very small)
-    domain.loc[ram_correction.index, "ram"] += ram_correction.ram
-    domain.loc[:, "ram"] *= alpha
-    if not ram_correction.empty:
-        print("RAM Correction", domain.loc[ram_correction.index, ["cb", "co", "ram"]])
+    domain = correct_domain(domain, ram_correction, alpha)
 
     # Calculate flow-based Domain, i.e. creating the relevant plot-points and lines
     fbmc = FBDomainPlots(ZONES, domain)
@@ -68,6 +54,7 @@ if __name__ == "__main__":
         mtu=mtu,
         exchange=eli_exchange if shift_mcp else None,
         lta_domain=None,
+        steps=2 if compact_export else 20,
     )
 
     # Create plot. 
@@ -77,9 +64,26 @@ if __name__ == "__main__":
         ZONES,
         None,
         alpha,
-        show_plot=True
+        show_plot=True,
+        hover_points=5 if compact_export else None,
+        compact=compact_export,
     )
 
+    # Alternatively, plot with a slider shifting a non-depicted exchange around the MCP
+    if slider_border:
+        incremental_domain = fbmc.incremental_flowbased_domain(domain_x, domain_y, mtu, eli_exchange)
+        flow = incremental_domain.flows[slider_border]
+        fig = create_shift_slider_plot(
+            incremental_domain, 
+            slider_border, 
+            np.linspace(flow - 1000, flow + 1000, 21), 
+            eli_exchange, 
+            ZONES, 
+            alpha, 
+            compact=compact_export
+        )
+
     # Write domain plot as html and open
-    fig.write_html("fb_domain.html", full_html=False, include_plotlyjs='cdn')
+    write_domain_html(fig, "fb_domain.html", full_html=False, include_plotlyjs='cdn')
+    from plotly.offline import plot
     plot(fig)
@@ -0,0 +1,45 @@
+import json
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import SyntheticResponse, synthetic_payloads
+from domain_viewer import data_processing
+from domain_viewer.data_processing import iter_json_records, process_final_computation
+
+RECORDS = [
+    {"id": 0, "cneName": "Line }]{[ \\\"quoted\\\"", "direction": None, "ptdf_DE": 0.12345},
+    {"id": 1, "cneName": "Übertragung Süd – Nord ⚡", "nested": {"a": [1, {"b": "}"}]}, "ptdf_DE": -1e-05},
+    {"id": 2, "cneName": "", "direction": "OPPOSITE", "ptdf_DE": None},
+    *({"id": i, "cneName": f"CNE_{i}", "iva": 0.0, "ptdf_DE": i/7} for i in range(3, 40)),
+]
+
+def chunked(payload, chunk_size):
+    return [payload[i:i + chunk_size] for i in range(0, len(payload), chunk_size)]
+
+def parse(payload, chunk_size, key="data"):
+    return [r for records in iter_json_records(chunked(payload, chunk_size), key=key) for r in records]
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_iter_json_records_chunk_sizes(indent):
+    payload = json.dumps({"meta": {"data": "no array"}, "data": RECORDS, "total": 40}, indent=indent, ensure_ascii=False)
+    payload = payload.encode()
+    for chunk_size in [1, 2, 3, 5, 7, 16, 64, 100, 1000, len(payload)]:
+        assert parse(payload, chunk_size) == RECORDS, chunk_size
+
+def test_iter_json_records_edge_cases():
+    assert parse(b'{"data": []}', 1) == []
+    assert parse(b'{"data" : [ {"a": 1} ] }', 4) == [{"a": 1}]
+    with pytest.raises(KeyError):
+        parse(b'{"other": [{"a": 1}]}', 3)
+    with pytest.raises(ValueError):
+        parse(b'{"data": [{"a": 1}, {"a": 2', 3)
+
+@pytest.mark.parametrize("chunk_size", [1 << 10, 1 << 14, 1 << 21])
+def test_process_final_computation_chunk_sizes(monkeypatch, chunk_size):
+    mtu = pd.Timestamp("2025-07-07 19:00").tz_localize("Europe/Berlin")
+    payload = synthetic_payloads(mtu, cbcos=500)["domain"]
+    monkeypatch.setattr(data_processing, "CHUNK_SIZE", len(payload.encode()))
+    expected = process_final_computation(SyntheticResponse(payload), mtu)
+    monkeypatch.setattr(data_processing, "CHUNK_SIZE", chunk_size)
+    pd.testing.assert_frame_equal(process_final_computation(SyntheticResponse(payload), mtu), expected)
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import synthetic_responses
+from domain_viewer.data_processing import (
+    ZONES, expand_iva, prepare_exchange, process_exchange, process_final_computation, process_lta, process_mcp
+)
+from domain_viewer.extended_lta_inclusion import ELISequence, calculate_FB_exchange, solve_ELI_lp
+
+MTUS = [pd.Timestamp(f"2025-07-07 {hour}:00").tz_localize("Europe/Berlin") for hour in [17, 18, 19]]
+
+def eli_inputs(mtu):
+    responses = synthetic_responses(mtu, cbcos=500, seed=mtu.hour)
+    mcp = process_mcp(responses["mcp"], mtu).loc[mtu.isoformat()]
+    lta = process_lta(responses["lta"], mtu)
+    exchange = prepare_exchange(process_exchange(responses["exchange"], mtu), mcp, mtu)
+    domain = expand_iva(process_final_computation(responses["domain"], mtu))
+    return domain, lta, mcp, exchange
+
+def assert_same_results(result, expected):
+    """Same alpha, RAM corrections and market clearing point. 
+
+    SlackNP is not penalised, alternative optima can move up to 10 MW of each net position 
+    between SlackNP and NetPosFB, and with it the FB flows. 
+    """
+    (df, df_np, ram_correction, alpha), (expected_df, expected_np, expected_correction, expected_alpha) = result, expected
+    np.testing.assert_allclose(alpha, expected_alpha, atol=1e-6)
+    pd.testing.assert_index_equal(ram_correction.index, expected_correction.index)
+    np.testing.assert_allclose(ram_correction.ram, expected_correction.ram, atol=1e-3)
+    np.testing.assert_allclose(df_np.NetPos, expected_np.NetPos, atol=1e-6)
+    np.testing.assert_allclose(df_np.NetPosLTA, expected_np.NetPosLTA, atol=1e-3)
+    np.testing.assert_allclose(df_np.NetPosFB + df_np.SlackNP, expected_np.NetPosFB + expected_np.SlackNP, atol=1e-3)
+    np.testing.assert_allclose(df.FlowLTA, expected_df.FlowLTA, atol=1e-3)
+    np.testing.assert_allclose(df.Flow, expected_df.Flow, atol=20)
+    for result_df in [df, expected_df]:
+        assert (result_df.Flow >= result_df.exchange + result_df.SlackFlowPos - result_df.SlackFlowNeg - 1e-6).all()
+
+def test_warm_started_sequence_matches_highs():
+    sequence = ELISequence(ZONES)
+    for mtu in MTUS:
+        domain, lta, mcp, exchange = eli_inputs(mtu)
+        expected = solve_ELI_lp(domain.copy(), lta, ZONES, mcp, exchange)
+        assert_same_results(sequence.solve(domain.copy(), lta, mcp, exchange, mtu=mtu.isoformat()), expected)
+
+def test_cvxpy_backends_match_highs():
+    pytest.importorskip("cvxpy")
+    from domain_viewer.extended_lta_inclusion import ELIModel
+    model = ELIModel(ZONES)
+    sequence = ELISequence(ZONES)
+    for mtu in MTUS:
+        domain, lta, mcp, exchange = eli_inputs(mtu)
+        expected = calculate_FB_exchange(domain.copy(), lta, ZONES, mcp, exchange)
+        assert_same_results(calculate_FB_exchange(domain.copy(), lta, ZONES, mcp, exchange, model=model), expected)
+        assert_same_results(solve_ELI_lp(domain.copy(), lta, ZONES, mcp, exchange), expected)
+        assert_same_results(sequence.solve(domain.copy(), lta, mcp, exchange, mtu=mtu.isoformat()), expected)
@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from domain_viewer.fbmc_domain import FBDomainPlots
+
+ZONES = ["DE", "FR", "NL", "BE"]
+
+def baseline_domain_plot(A, b, indices, plot_limits=None):
+    """create_domain_plot as it was before the vectorisation, one line at a time"""
+    A = np.take(np.array(A), indices, axis=0)
+    b = np.take(np.array(b), indices, axis=0)
+    Ab = np.concatenate((np.array(A), np.array(b).reshape(len(b), 1)), axis=1)
+    if plot_limits:
+        ((x_max, x_min), (y_max, y_min)) = plot_limits
+    else: 
+        x_max, y_max = max(b)*2, max(b)*2
+        x_min, y_min = -max(b)*2, -max(b)*2
+
+    steps = 20
+    eps = 1.001
+    plot_equations = []
+    plot_indices = []
+    for index in range(0, len(Ab)):
+        if any([a != 0 for a in Ab[index][:-1]]):
+            if Ab[index][0] == 0:
+                x_coordinates = [x for x in np.linspace(x_min, x_max, steps)]
+                y_coordinates = [Ab[index][2]/ Ab[index][1] for x in x_coordinates]
+            elif Ab[index][1] == 0:
+                y_coordinates = [y for y in np.linspace(y_min, y_max, steps)]
+                x_coordinates = [Ab[index][2]/ Ab[index][0] for y in y_coordinates]
+            elif abs(Ab[index][1]/Ab[index][0]) > 1:
+                x_range_max = (Ab[index][2] - y_max*Ab[index][1])/Ab[index][0]
+                x_range_min = (Ab[index][2] - y_min*Ab[index][1])/Ab[index][0]
+                x_coordinates = [x for x in np.linspace(max(x_min, min(x_range_max, x_range_min)), min(x_max, max(x_range_max, x_range_min)), steps)]
+                y_coordinates = [(Ab[index][2] - x*Ab[index][0]) / Ab[index][1] for x in x_coordinates]
+            else:
+                y_range_max = (Ab[index][2] - x_max*Ab[index][0])/Ab[index][1] 
+                y_range_min = (Ab[index][2] - x_min*Ab[index][0])/Ab[index][1] 
+                y_coordinates = [y for y in np.linspace(max(y_min, min(y_range_max, y_range_min)), min(y_max, max(y_range_max, y_range_min)), steps)]
+                x_coordinates = [(Ab[index][2] - y*Ab[index][1]) / Ab[index][0] for y in y_coordinates]
+
+            condition_visible = (
+                all([(x <= x_max*eps) and (x >= x_min*eps) for x in x_coordinates]) and 
+                all([(y <= y_max*eps) and (y >= y_min*eps) for y in y_coordinates]) 
+            )
+            if condition_visible:
+                plot_equations.append([x_coordinates, y_coordinates])
+                plot_indices.append(index)
+    return plot_equations, plot_indices
+
+def random_constraints(seed, m=300):
+    """Projected PTDFs with horizontal, vertical, zero and duplicate rows and RAMs"""
+    rng = np.random.default_rng(seed)
+    A = rng.normal(size=(m, 2))
+    A[:m//10, 0] = 0
+    A[m//10:m//5, 1] = 0
+    A[m//5:m//5 + 5] = 0
+    A[-20:] = A[:20]
+    b = rng.uniform(100, 3000, m)
+    return A, b
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("plot_limits", [None, ((4000, -8000), (3000, -2500))])
+def test_create_domain_plot_matches_baseline(seed, plot_limits):
+    A, b = random_constraints(seed)
+    indices = np.random.default_rng(seed).permutation(len(b))[:250]
+    fbmc = FBDomainPlots(ZONES, None)
+
+    plot_equations, plot_indices = fbmc.create_domain_plot(A, b, indices, plot_limits)
+    expected_equations, expected_indices = baseline_domain_plot(A, b, indices, plot_limits)
+
+    np.testing.assert_array_equal(plot_indices, expected_indices)
+    np.testing.assert_array_equal(plot_equations, np.array(expected_equations).reshape(-1, 2, 20))
+
+def reference_intersection(A, b):
+    """Vertices (counter clockwise) and area of A x <= b by cdd vertex enumeration and ConvexHull"""
+    from scipy.spatial import ConvexHull
+    from domain_viewer.fbmc_domain import compute_polytope_vertices
+    hull = ConvexHull(np.array(compute_polytope_vertices(A, b)))
+    return hull.points[hull.vertices], hull.volume
+
+def polygon_area(vertices):
+    x, y = vertices[:-1, 0], vertices[:-1, 1]
+    return 0.5*(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+
+def halfplanes(case, seed, m=200):
+    """Bounded half-planes A x <= b of various kinds"""
+    rng = np.random.default_rng(seed)
+    angles = rng.uniform(0, 2*np.pi, m)
+    A = np.vstack([np.cos(angles), np.sin(angles)]).T*rng.uniform(0.1, 2, (m, 1))
+    b = rng.uniform(500, 3000, m)
+    if case == "duplicate":
+        A[m//2:], b[m//2:] = A[:m//2], b[:m//2]
+    elif case == "parallel":
+        A[m//2:], b[m//2:] = 3*A[:m//2], b[:m//2]*rng.uniform(2, 4, m//2)
+    elif case == "zero":
+        A[:10] = 0
+    elif case == "non-positive":
+        # Feasible region around (4000, -2500) away from the origin, with negative rams and a 
+        # zero ram that still contains (4000, -2500)
+        center = np.array([4000, -2500])
+        b = b + A @ center
+        A[0], b[0] = -center/np.linalg.norm(center), 0
+    return A, b
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("case", ["random", "duplicate", "parallel", "zero", "non-positive"])
+def test_halfplane_intersection_matches_cdd(case, seed):
+    from domain_viewer.fbmc_domain import halfplane_intersection
+    A, b = halfplanes(case, seed)
+    if case == "non-positive":
+        assert (b <= 0).any()
+    vertices, indices = halfplane_intersection(A, b)
+    expected_vertices, expected_area = reference_intersection(A, b)
+
+    assert len(indices) == len(expected_vertices)
+    # Both counter clockwise, align the first vertex
+    start = np.argmin(np.linalg.norm(vertices[:-1] - expected_vertices[0], axis=1))
+    np.testing.assert_allclose(np.roll(vertices[:-1], -start, axis=0), expected_vertices, rtol=1e-8, atol=1e-6)
+    np.testing.assert_allclose(polygon_area(vertices), expected_area, rtol=1e-9)
+    # Vertex i is on the constraints indices[i] and indices[i + 1]
+    np.testing.assert_allclose((A[indices]*vertices[:-1]).sum(axis=1), b[indices], atol=1e-6)
+    np.testing.assert_allclose((A[np.roll(indices, -1)]*vertices[:-1]).sum(axis=1), b[np.roll(indices, -1)], atol=1e-6)
+
+def test_halfplane_intersection_errors():
+    from domain_viewer.fbmc_domain import NotAPolytopeError, halfplane_intersection
+    A = np.array([[1, 0], [0, 1], [-1, 0], [0, -1]], dtype=float)
+    with pytest.raises(NotAPolytopeError):
+        halfplane_intersection(A[:3], np.array([1, 1, 1.]))
+    with pytest.raises(NotAPolytopeError):
+        halfplane_intersection(A[:3], np.array([1, 1, -0.5]))
+    with pytest.raises(ValueError):
+        halfplane_intersection(A, np.array([1, 1, -2, 1.]))
+
+def test_incremental_shift_matches_full_domain():
+    from benchmarks.synthetic import synthetic_data
+    from domain_viewer.data_processing import ZONES, expand_iva, prepare_exchange
+    from domain_viewer.extended_lta_inclusion import correct_domain, solve_ELI_lp
+
+    mtu = pd.Timestamp("2025-07-07 19:00").tz_localize("Europe/Berlin")
+    data = synthetic_data(mtu, cbcos=3000, iva_share=0.2)
+    mcp = data["mcp"].loc[mtu.isoformat()]
+    domain = expand_iva(data["domain"])
+    exchange = prepare_exchange(data["exchange"], mcp, mtu)
+    eli_exchange, _, ram_correction, alpha = solve_ELI_lp(domain.copy(), data["lta"], ZONES, mcp, exchange)
+    fbmc = FBDomainPlots(ZONES, correct_domain(domain, ram_correction, alpha))
+
+    incremental = fbmc.incremental_flowbased_domain(["DE", "FR"], ["DE", "AT"], mtu, eli_exchange)
+    for flow in [None, -2000, 0, 1500]:
+        flows = incremental.flows.copy()
+        if flow is not None:
+            flows.iloc[[0, -1]] = flow
+        shifted = incremental.shift(flows.to_dict())
+        b = incremental.ram - incremental.exchange_ptdf @ flows.values
+        expected = fbmc.create_flowbased_domain(
+            incremental.domain_info, incremental.A_hat, b, ["DE", "FR"], ["DE", "AT"], mtu, steps=2
+        )
+        np.testing.assert_allclose(shifted.feasible_region_vertices, expected.feasible_region_vertices, rtol=1e-9)
+        np.testing.assert_allclose(shifted.domain_equations, expected.domain_equations, rtol=1e-9)
+        pd.testing.assert_frame_equal(shifted.constraint_data, expected.constraint_data, rtol=1e-9)
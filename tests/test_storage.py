@@ -0,0 +1,69 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from benchmarks.jao_server import JAOStandIn, create_server, synthetic_source
+from domain_viewer import storage
+from domain_viewer.data_processing import (
+    TIMEZONE, create_request_session, fetch_data, load_data, load_data_from_db, load_range
+)
+
+@pytest.fixture(scope="module")
+def base_url():
+    """Base URL of a JAO stand-in serving small synthetic domains"""
+    server = create_server(port=0, stand_in=JAOStandIn(synthetic_source(cbcos=100)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch, base_url):
+    monkeypatch.setattr(storage, "DATA_DIR", tmp_path)
+    monkeypatch.setenv("JAO_BASE_URL", base_url)
+    return tmp_path
+
+def assert_same_data(data, expected):
+    assert data.keys() == expected.keys()
+    for k in expected:
+        # The cached domain index is named "index"
+        pd.testing.assert_frame_equal(data[k], expected[k], check_names=False)
+
+@pytest.mark.parametrize("day, hours", [("2025-07-07", 24), ("2025-10-26", 25), ("2025-03-30", 23)])
+def test_fetch_cache_round_trip(data_dir, day, hours):
+    request_session = create_request_session()
+    start = pd.Timestamp(day).tz_localize(TIMEZONE)
+    mtus = load_range(start, start + pd.DateOffset(days=1), request_session)
+    assert len(mtus) == hours
+    assert len(list(data_dir.joinpath("domain", day).glob("*.feather"))) == hours
+
+    for mtu in mtus:
+        cached = load_data(mtu, request_session)
+        assert_same_data(cached, load_data(mtu, request_session, force_reload=True))
+        assert (cached["domain"].mtu == mtu.isoformat()).all()
+
+def test_migrate_legacy_cache(data_dir):
+    start = pd.Timestamp("2025-10-26 01:00").tz_localize(TIMEZONE)
+    mtus = pd.date_range(start, periods=3, freq="h")
+    expected = {mtu: load_data(mtu, None, force_reload=True) for mtu in mtus}
+    for path in data_dir.glob("*/*/*.feather"):
+        path.unlink()
+
+    # Single feather file per table as written by earlier versions, without compact types 
+    data = fetch_data(create_request_session(), mtus[0], mtus[-1] + pd.Timedelta(hours=1))
+    for k, df in data.items():
+        df = df.reset_index()
+        df = df.astype({c: str for c in df.select_dtypes("category").columns})
+        df.to_feather(data_dir.joinpath(f"{k}.db"))
+    assert not storage.partition_path("domain", mtus[0]).is_file()
+
+    storage.migrate_legacy_cache()
+    assert not list(data_dir.glob("*.db"))
+    assert len(list(data_dir.glob("*.db.migrated"))) == len(data)
+    for mtu in mtus:
+        assert storage.is_cached(mtu)
+        data = load_data_from_db(mtu)
+        for k in expected[mtu]:
+            pd.testing.assert_frame_equal(
+                data[k], expected[mtu][k], check_names=False, check_dtype=False, check_categorical=False
+            )